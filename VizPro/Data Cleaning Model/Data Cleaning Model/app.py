@@ -1,14 +1,36 @@
 from flask import Flask, render_template, request, jsonify, send_file
-import pandas as pd
-import numpy as np
 from io import BytesIO
-from utils.data_analysis import analyze_columns
+import json
+import os
+import tempfile
+from utils.dataset_store import DatasetStore
+from utils.json_utils import dataframe_to_json
+from utils.cleaning_pipeline import (
+    DEDUPE_OPERATIONS, SUPPORTED_OPERATIONS, compile_operations, operation_columns
+)
+from utils.recipes import build_recipe, apply_recipe_to_csv
+# Shared with the prediction app; the utils imports above put them on the path
+from vizpro_common.paging import parse_window_args, get_row_window
+from vizpro_common.ingestion import read_table, reader_settings, memory_report
+from vizpro_common.dataset_cache import DatasetCache
+from vizpro_common.figure_cache import FigureCache
 import logging
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+app.config['CACHE_FOLDER'] = 'cache'
+# Memory for built figures; set FIGURE_CACHE_FOLDER to spill evicted ones to disk
+app.config['FIGURE_CACHE_BYTES'] = int(os.environ.get('FIGURE_CACHE_BYTES', 64 * 1024 * 1024))
+app.config['FIGURE_CACHE_FOLDER'] = os.environ.get('FIGURE_CACHE_FOLDER')
 logging.basicConfig(level=logging.INFO)
 
+# Uploaded datasets live server-side; clients refer to them by handle
+dataset_store = DatasetStore()
+# Parsed uploads on disk, so an identical file is never parsed twice
+dataset_cache = DatasetCache(app.config['CACHE_FOLDER'])
+# Figures by dataset fingerprint and chart spec, so repeat views skip rebuilding
+figure_cache = FigureCache(app.config['FIGURE_CACHE_BYTES'], app.config['FIGURE_CACHE_FOLDER'])
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -23,15 +45,17 @@ def upload_file():
         if not file.filename:
             return jsonify({'success': False, 'error': 'No file selected'})
 
-        df = read_file(file)
+        df, cache_key, cache_hit = read_file(file)
         if df is None:
             return jsonify({'success': False, 'error': 'Unsupported file format'})
 
         # Clean and prepare data
         preview_data = clean_data_for_json(df.head())
         
+        entry = dataset_store.add(df, file.filename, cache_key)
+
         # Ensure analysis is not None
-        analysis = analyze_columns(df) or {
+        analysis = entry.analysis() or {
             'data_types': {},
             'missing_values': {},
             'unique_counts': {},
@@ -41,15 +65,20 @@ def upload_file():
         }
         
         if not preview_data:
+            dataset_store.remove(entry.dataset_id)
             return jsonify({'success': False, 'error': 'Error processing data'})
 
         return jsonify({
             'success': True,
+            'dataset_id': entry.dataset_id,
+            'version': entry.version,
             'preview': preview_data,
             'columns': df.columns.tolist(),
             'analysis': analysis,
             'total_rows': len(df),
-            'total_columns': len(df.columns)
+            'total_columns': len(df.columns),
+            'memory': memory_report(df),
+            'cache': {'key': cache_key, 'hit': cache_hit}
         })
         
     except Exception as e:
@@ -57,39 +86,29 @@ def upload_file():
         return jsonify({'success': False, 'error': str(e)})
 
 def read_file(file):
+    """Parse an upload, reusing the cached result for a file seen before.
+
+    Returns ``(df, cache_key, cache_hit)``; ``df`` is None on failure.
+    """
     try:
-        if file.filename.endswith('.csv'):
-            return pd.read_csv(file)
-        elif file.filename.endswith(('.xlsx', '.xls')):
-            return pd.read_excel(file)
-        return None
+        return dataset_cache.load(file, file.filename, read_table, reader_settings())
     except Exception as e:
         logging.error(f"Error reading file: {str(e)}")
+        return None, None, False
+
+def get_dataset_entry(data):
+    """Look up the stored dataset referenced by a request payload."""
+    if not data or 'dataset_id' not in data:
+        return None
+    try:
+        return dataset_store.get(data['dataset_id'])
+    except KeyError:
         return None
 
-def clean_data_for_json(df):
+def clean_data_for_json(df, orient='records'):
     """Clean DataFrame to ensure JSON serialization."""
     try:
-        # Replace problematic values
-        df_clean = df.replace({
-            np.nan: None,
-            np.inf: None,
-            -np.inf: None
-        })
-        
-        # Convert to dictionary carefully
-        records = []
-        for _, row in df_clean.iterrows():
-            clean_row = {}
-            for column in df_clean.columns:
-                value = row[column]
-                if pd.isna(value):
-                    clean_row[column] = None
-                else:
-                    clean_row[column] = str(value) if isinstance(value, (np.generic, pd.Timestamp)) else value
-            records.append(clean_row)
-        
-        return records
+        return dataframe_to_json(df, orient=orient)
     except Exception as e:
         logging.error(f"Error in clean_data_for_json: {str(e)}")
         return []
@@ -98,90 +117,151 @@ def clean_data_for_json(df):
 def clean_data():
     try:
         data = request.json
-        if not data or 'data' not in data or 'operations' not in data:
+        if not data or 'dataset_id' not in data or 'operations' not in data:
             return jsonify({'error': 'Invalid request data'}), 400
 
-        # Convert to DataFrame and handle NaN values
-        df = pd.DataFrame(data['data']).replace(['NaN', 'null', ''], np.nan)
+        entry = get_dataset_entry(data)
+        if entry is None:
+            return jsonify({'error': 'Dataset not found'}), 404
+
         operations = data['operations']
-        
-        # Track failed operations
-        failed_operations = []
-        
-        for op in operations:
-            try:
-                # Validate operation before processing
-                if not all(key in op for key in ['type', 'column']):
-                    failed_operations.append({
-                        'type': op.get('type', 'unknown'),
-                        'error': 'Missing required parameters'
-                    })
-                    continue
-
-                # Validate column exists
-                if op['column'] not in df.columns:
-                    failed_operations.append({
-                        'type': op['type'],
-                        'column': op['column'],
-                        'error': 'Column not found'
-                    })
-                    continue
-
-                if op['type'] == 'fill_mean':
-                    df[op['column']] = pd.to_numeric(df[op['column']], errors='coerce')
-                    mean_value = df[op['column']].mean()
-                    if pd.isna(mean_value):
-                        raise ValueError("Cannot calculate mean of non-numeric data")
-                    df[op['column']].fillna(mean_value, inplace=True)
-                elif op['type'] == 'fill_median':
-                    df[op['column']] = pd.to_numeric(df[op['column']], errors='coerce')
-                    df[op['column']].fillna(df[op['column']].median(), inplace=True)
-                elif op['type'] == 'fill_mode':
-                    df[op['column']].fillna(df[op['column']].mode()[0], inplace=True)
-                elif op['type'] == 'fill_value':
-                    df[op['column']].fillna(op['value'], inplace=True)
-                elif op['type'] == 'remove_rows':
-                    df.dropna(subset=[op['column']], inplace=True)
-                elif op['type'] == 'ffill':
-                    df[op['column']].fillna(method='ffill', inplace=True)
-                elif op['type'] == 'bfill':
-                    df[op['column']].fillna(method='bfill', inplace=True)
-                elif op['type'] == 'interpolate':
-                    df[op['column']] = pd.to_numeric(df[op['column']], errors='coerce')
-                    df[op['column']].interpolate(method='linear', inplace=True)
-            except Exception as e:
-                failed_operations.append({
-                    'type': op['type'],
-                    'column': op['column'],
-                    'error': str(e)
-                })
-                logging.error(f"Error in operation {op['type']}: {str(e)}")
-                continue
-
-        # Clean data for JSON response
+        df = entry.df
+        columns_before = df.columns.tolist()
+        rows_before = len(df)
+
+        # The plan works on a shallow copy, so a failing request leaves the
+        # stored data intact
+        plan = compile_operations(operations)
+        df, failed_operations = plan.execute(df, entry.row_index)
+
+        failed = {(f.get('type'), f.get('column')) for f in failed_operations}
+        applied = [
+            op for op in operations
+            if isinstance(op, dict) and op.get('type') in SUPPORTED_OPERATIONS
+            and (op['type'] in DEDUPE_OPERATIONS or 'column' in op)
+            and (op['type'], op.get('column')) not in failed
+            and all(column in columns_before for column in operation_columns(op))
+        ]
+        changed_columns = sorted({op['column'] for op in applied if 'column' in op})
+        # A failed fill may still have coerced its column, so every column
+        # an operation touched gets re-profiled
+        touched = {
+            op['column'] for op in operations
+            if isinstance(op, dict) and op.get('column') in columns_before
+        }
+        entry = dataset_store.update(entry.dataset_id, df, applied, touched)
+
+        # Only a preview and summary go back; the full table stays server-side
         cleaned_preview = clean_data_for_json(df.head())
-        analysis = analyze_columns(df)
+        analysis = entry.analysis()
 
         return jsonify({
             'success': True,
+            'dataset_id': entry.dataset_id,
+            'version': entry.version,
+            'changed_columns': changed_columns,
+            'rows_removed': rows_before - len(df),
+            'total_rows': len(df),
             'preview': cleaned_preview,
             'analysis': analysis,
-            'missing_data': df.isnull().sum().to_dict(),
-            'duplicates': int(df.duplicated().sum()),
-            'failed_operations': failed_operations
+            'missing_data': analysis['missing_values'] if analysis else df.isnull().sum().to_dict(),
+            'duplicates': entry.duplicate_count(),
+            'failed_operations': failed_operations,
+            **({'plan': plan.explain(entry.df)} if data.get('explain') else {})
         })
         
     except Exception as e:
         logging.error(f"Error in clean_data: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/clean/explain', methods=['POST'])
+def explain_clean():
+    """Show how an operation list would be fused, without running it."""
+    try:
+        data = request.get_json(silent=True)
+        if not data or not isinstance(data.get('operations'), list):
+            return jsonify({'error': 'Invalid request data: operations must be a list'}), 400
+
+        entry = get_dataset_entry(data)
+        plan = compile_operations(data['operations'])
+        return jsonify({
+            'success': True,
+            'plan': plan.explain(entry.df if entry is not None else None)
+        })
+    except Exception as e:
+        logging.error(f"Error explaining cleaning plan: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/recipe', methods=['GET'])
+def download_recipe():
+    """Save the operations applied to a dataset as a replayable recipe."""
+    entry = get_dataset_entry(request.args)
+    if entry is None:
+        return jsonify({'error': 'Dataset not found'}), 404
+
+    recipe = build_recipe(entry.history, entry.filename)
+    output = BytesIO(json.dumps(recipe, indent=2).encode('utf-8'))
+    return send_file(
+        output,
+        mimetype='application/json',
+        as_attachment=True,
+        download_name='cleaning_recipe.json'
+    )
+
+@app.route('/apply_recipe', methods=['POST'])
+def apply_recipe():
+    """Replay a recipe over an uploaded CSV in chunks and return the result."""
+    source = destination = None
+    try:
+        if 'file' not in request.files or 'recipe' not in request.files:
+            return jsonify({'error': 'Both a CSV file and a recipe are required'}), 400
+        if not request.files['file'].filename.endswith('.csv'):
+            return jsonify({'error': 'Recipes can only be replayed over CSV files'}), 400
+
+        # Parsed here, so uploaded text is never taken for a server-side path
+        try:
+            recipe = json.loads(request.files['recipe'].read().decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            return jsonify({'error': 'The recipe must be a JSON file'}), 400
+        if not isinstance(recipe, dict):
+            return jsonify({'error': 'Not a cleaning recipe'}), 400
+        source = tempfile.NamedTemporaryFile(suffix='.csv', delete=False).name
+        destination = tempfile.NamedTemporaryFile(suffix='.csv', delete=False).name
+        request.files['file'].save(source)
+
+        report = apply_recipe_to_csv(recipe, source, destination)
+        logging.info(f"Recipe replayed: {report}")
+
+        with open(destination, 'rb') as f:
+            output = BytesIO(f.read())
+        response = send_file(
+            output,
+            mimetype='text/csv',
+            as_attachment=True,
+            download_name='cleaned_data.csv'
+        )
+        response.headers['X-Rows-In'] = str(report['rows_in'])
+        response.headers['X-Rows-Out'] = str(report['rows_out'])
+        response.headers['X-Failed-Operations'] = json.dumps(report['failed_operations'])
+        return response
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error applying recipe: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+    finally:
+        for path in (source, destination):
+            if path and os.path.exists(path):
+                os.remove(path)
+
 @app.route('/download', methods=['POST'])
 def download():
     try:
-        data = request.json
-        df = pd.DataFrame(data['data'])
+        entry = get_dataset_entry(request.json)
+        if entry is None:
+            return jsonify({'error': 'Dataset not found'}), 404
         output = BytesIO()
-        df.to_csv(output, index=False)
+        entry.df.to_csv(output, index=False)
         output.seek(0)
         return send_file(
             output,
@@ -197,51 +277,69 @@ from utils.visualization import (create_correlation_matrix, create_scatter_plot,
                                create_time_series, create_missing_data_matrix,
                                create_cluster_visualization)
 from utils.json_utils import serialize_numpy
-import json
+from vizpro_common.downsampling import parse_max_points
+
+def visualization_params(viz_type, data, max_points):
+    """The request fields a chart depends on; they key the figure cache."""
+    if viz_type == 'scatter':
+        return {'x_column': data.get('x_column'), 'y_column': data.get('y_column'),
+                'color_column': data.get('color_column'), 'max_points': max_points}
+    if viz_type == 'pca':
+        return {'max_points': max_points}
+    if viz_type == 'anomalies':
+        return {'column': data.get('column')}
+    if viz_type == 'timeseries':
+        return {'time_column': data.get('time_column'), 'value_column': data.get('value_column'),
+                'max_points': max_points}
+    if viz_type == 'cluster':
+        return {'columns': data.get('columns', []), 'n_clusters': data.get('n_clusters', 3)}
+    return {}
+
+def build_visualization(df, viz_type, params):
+    if viz_type == 'correlation':
+        return create_correlation_matrix(df)
+    elif viz_type == 'scatter':
+        if not params['x_column'] or not params['y_column']:
+            raise ValueError("Both x and y columns must be specified")
+        return create_scatter_plot(df, params['x_column'], params['y_column'],
+                                   params['color_column'], params['max_points'])
+    elif viz_type == 'pca':
+        return perform_pca_visualization(df, params['max_points'])
+    elif viz_type == 'anomalies':
+        return detect_anomalies(df, params['column'])
+    elif viz_type == 'timeseries':
+        return create_time_series(df, params['time_column'], params['value_column'], params['max_points'])
+    elif viz_type == 'missing_matrix':
+        return create_missing_data_matrix(df)
+    elif viz_type == 'cluster':
+        return create_cluster_visualization(df, params['columns'], params['n_clusters'])
+    raise ValueError('Unsupported visualization type')
 
 @app.route('/visualize', methods=['POST'])
 def visualize_data():
     try:
         data = request.json
-        if not data or 'data' not in data or 'type' not in data:
+        if not data or 'dataset_id' not in data or 'type' not in data:
             return jsonify({'error': 'Invalid request data'}), 400
 
-        df = pd.DataFrame(data['data'])
+        entry = get_dataset_entry(data)
+        if entry is None:
+            return jsonify({'error': 'Dataset not found'}), 404
+
+        df = entry.df
         viz_type = data['type']
         
-        result = None
         error = None
+        cache_hit = False
 
         try:
-            if viz_type == 'correlation':
-                result = create_correlation_matrix(df)
-            elif viz_type == 'scatter':
-                x_col = data.get('x_column')
-                y_col = data.get('y_column')
-                if not x_col or not y_col:
-                    raise ValueError("Both x and y columns must be specified")
-                result = create_scatter_plot(df, x_col, y_col, data.get('color_column'))
-            elif viz_type == 'pca':
-                result = perform_pca_visualization(df)
-            elif viz_type == 'anomalies':
-                column = data.get('column')
-                result = detect_anomalies(df, column)
-            elif viz_type == 'timeseries':
-                time_col = data.get('time_column')
-                value_col = data.get('value_column')
-                result = create_time_series(df, time_col, value_col)
-            elif viz_type == 'missing_matrix':
-                result = create_missing_data_matrix(df)
-            elif viz_type == 'cluster':
-                columns = data.get('columns', [])
-                n_clusters = data.get('n_clusters', 3)
-                result = create_cluster_visualization(df, columns, n_clusters)
-            else:
-                raise ValueError('Unsupported visualization type')
-
-            # Serialize numpy arrays and other objects
-            serialized_result = serialize_numpy(result)
-            
+            # Scatter, PCA and time series plots send at most this many points
+            max_points = parse_max_points(data.get('max_points'))
+            params = visualization_params(viz_type, data, max_points)
+            serialized_result, cache_hit = figure_cache.get_or_create(
+                entry.fingerprint(), viz_type, params,
+                lambda: serialize_numpy(build_visualization(df, viz_type, params))
+            )
         except Exception as e:
             error = str(e)
             logging.error(f"Visualization error: {error}")
@@ -260,42 +358,119 @@ def visualize_data():
 
         return jsonify({
             'success': True,
-            'plot': serialized_result
+            'plot': serialized_result,
+            'figure_cache': {'hit': cache_hit}
         })
 
     except Exception as e:
         logging.error(f"Error in visualization endpoint: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/figure_cache', methods=['GET'])
+def figure_cache_stats():
+    """Hit and miss counters of the figure cache."""
+    return jsonify(figure_cache.stats())
+
 @app.route('/export_report', methods=['POST'])
 def export_report():
     try:
-        data = request.json
-        df = pd.DataFrame(data['data'])
+        entry = get_dataset_entry(request.json)
+        if entry is None:
+            return jsonify({'error': 'Dataset not found'}), 404
+        df = entry.df
+        analysis = entry.analysis()
         
         # Generate summary statistics
         summary = {
             'basic_stats': df.describe().to_dict(),
-            'missing_values': df.isnull().sum().to_dict(),
-            'duplicates': int(df.duplicated().sum()),
+            'missing_values': analysis['missing_values'] if analysis else df.isnull().sum().to_dict(),
+            'duplicates': entry.duplicate_count(),
             'data_types': df.dtypes.astype(str).to_dict()
         }
         
         # Create visualizations
+        # Shared with /visualize through the figure cache
         visualizations = {
-            'correlation': create_correlation_matrix(df),
-            'missing_matrix': create_missing_data_matrix(df)
+            viz_type: figure_cache.get_or_create(
+                entry.fingerprint(), viz_type, {},
+                lambda viz_type=viz_type: serialize_numpy(build_visualization(df, viz_type, {}))
+            )[0]
+            for viz_type in ('correlation', 'missing_matrix')
         }
         
         return jsonify({
             'success': True,
             'summary': summary,
-            'visualizations': {k: v.to_json() for k, v in visualizations.items()}
+            'visualizations': visualizations
         })
 
     except Exception as e:
         logging.error(f"Error generating report: {str(e)}")
         return jsonify({'error': str(e)}), 400
 
+@app.route('/rows', methods=['GET'])
+def get_rows():
+    """Return one window of a stored dataset for scrolling previews."""
+    try:
+        entry = get_dataset_entry(request.args)
+        if entry is None:
+            return jsonify({'success': False, 'error': 'Dataset not found'}), 404
+
+        offset, limit, columns, sort = parse_window_args(request.args)
+        df = entry.df
+        window = get_row_window(df, offset, limit, columns, sort, entry.order_cache)
+
+        return jsonify({
+            'success': True,
+            'dataset_id': entry.dataset_id,
+            'version': entry.version,
+            'offset': offset,
+            'limit': limit,
+            'total_rows': len(df),
+            'columns': window.columns.tolist(),
+            'rows': clean_data_for_json(window, orient=request.args.get('orient', 'records'))
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error in get_rows: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/datasets/<dataset_id>/duplicates', methods=['GET'])
+def dataset_duplicates(dataset_id):
+    """Duplicate row count from the row-hash index, optionally on a subset."""
+    try:
+        entry = dataset_store.get(dataset_id)
+    except KeyError:
+        return jsonify({'error': 'Dataset not found'}), 404
+
+    columns = [c for c in request.args.get('columns', '').split(',') if c] or None
+    try:
+        duplicates = entry.duplicate_count(columns)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'dataset_id': entry.dataset_id,
+        'version': entry.version,
+        'columns': columns,
+        'duplicates': duplicates,
+        'total_rows': len(entry.df)
+    })
+
+@app.route('/datasets/<dataset_id>', methods=['GET', 'DELETE'])
+def dataset_info(dataset_id):
+    try:
+        entry = dataset_store.get(dataset_id)
+    except KeyError:
+        return jsonify({'error': 'Dataset not found'}), 404
+
+    if request.method == 'DELETE':
+        dataset_store.remove(dataset_id)
+        return jsonify({'success': True, 'dataset_id': dataset_id})
+
+    return jsonify({'success': True, **entry.summary()})
+
 if __name__ == '__main__':
     app.run(host='127.0.0.1', port=5001, debug=True)
@@ -0,0 +1,26 @@
+"""Replay a saved cleaning recipe over a CSV file in bounded memory.
+
+Usage:
+    python apply_recipe.py cleaning_recipe.json input.csv output.csv [--chunksize N]
+"""
+import argparse
+import json
+
+from utils.recipes import DEFAULT_CHUNKSIZE, apply_recipe_to_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recipe', help='Recipe JSON downloaded from the app')
+    parser.add_argument('source', help='CSV file to clean')
+    parser.add_argument('destination', help='Where to write the cleaned CSV')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help='Rows read per chunk (default: %(default)s)')
+    args = parser.parse_args()
+
+    report = apply_recipe_to_csv(args.recipe, args.source, args.destination, args.chunksize)
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == '__main__':
+    main()
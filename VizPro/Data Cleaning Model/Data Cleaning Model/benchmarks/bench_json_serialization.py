@@ -0,0 +1,69 @@
+"""Compare the row-by-row preview serializer with the columnar one.
+
+Usage:
+    python benchmarks/bench_json_serialization.py [path/to/SuperStore_Sales_Dataset.csv] [--repeat N]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from utils.json_utils import dataframe_to_json
+
+DEFAULT_DATASET = os.path.join(os.path.dirname(__file__), '..', '..', '..', '..',
+                               'Dataset', 'SuperStore_Sales_Dataset.csv')
+
+
+def legacy_clean_data_for_json(df):
+    """The previous iterrows-based implementation, kept for comparison."""
+    df_clean = df.replace({
+        np.nan: None,
+        np.inf: None,
+        -np.inf: None
+    })
+    records = []
+    for _, row in df_clean.iterrows():
+        clean_row = {}
+        for column in df_clean.columns:
+            value = row[column]
+            if pd.isna(value):
+                clean_row[column] = None
+            else:
+                clean_row[column] = str(value) if isinstance(value, (np.generic, pd.Timestamp)) else value
+        records.append(clean_row)
+    return records
+
+
+def best_time(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('dataset', nargs='?', default=DEFAULT_DATASET)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.dataset, encoding='utf-8-sig')
+    print(f"Dataset: {len(df)} rows x {len(df.columns)} columns")
+    print(f"{'rows':>8} {'legacy rows/s':>15} {'records rows/s':>15} {'columns rows/s':>15} {'speedup':>8}")
+
+    for n in (5, 100, 1000, len(df)):
+        sample = df.head(n)
+        legacy = best_time(legacy_clean_data_for_json, sample, args.repeat)
+        records = best_time(lambda d: dataframe_to_json(d, orient='records'), sample, args.repeat)
+        columns = best_time(lambda d: dataframe_to_json(d, orient='columns'), sample, args.repeat)
+        print(f"{n:>8} {n / legacy:>15,.0f} {n / records:>15,.0f} {n / columns:>15,.0f} {legacy / records:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
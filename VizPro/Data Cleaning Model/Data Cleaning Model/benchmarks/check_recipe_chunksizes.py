@@ -0,0 +1,94 @@
+"""Check that replaying a recipe writes the same CSV whatever the chunk size.
+
+Usage:
+    python benchmarks/check_recipe_chunksizes.py [recipe.json input.csv] [--chunksizes 1 2 3 ...]
+
+Without a recipe, a set of small cases known to be sensitive to chunk
+boundaries is checked, each also against the same cleaning done by pandas
+on the whole file in memory.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from utils.recipes import build_recipe, apply_recipe_to_csv
+
+DEFAULT_CHUNKSIZES = (1, 2, 3, 5, 100000)
+
+# (name, CSV text, operations, the same cleaning on the whole DataFrame)
+CASES = [
+    ('dedupe, text column empty in some chunks', "id,name\n1,\n2,a\n1,\n",
+     [{'type': 'dedupe'}], lambda df: df.drop_duplicates()),
+    ('dedupe, ints and floats', "a,b\n1,x\n,y\n1.0,x\n2,\n2,\n1,x\n",
+     [{'type': 'dedupe'}], lambda df: df.drop_duplicates()),
+    ('dedupe on subset, booleans with gaps', "a,b,c\n1,True,x\n2,,y\n1,True,z\n",
+     [{'type': 'dedupe_on_subset', 'columns': ['a', 'b']}], lambda df: df.drop_duplicates(['a', 'b'])),
+    ('fill_value, text column empty in some chunks', "id,name\n1,\n2,a\n3,\n4,\n",
+     [{'type': 'fill_value', 'column': 'name', 'value': 7}], lambda df: df.fillna({'name': 7})),
+    ('fill_value, whole numbers with a gap', "id,n\n1,5\n2,6\n3,\n4,8\n",
+     [{'type': 'fill_value', 'column': 'n', 'value': 7}], lambda df: df.fillna({'n': 7})),
+    ('fill_mode, numbers and text', "id,c\n1,2\n2,\n3,x\n4,2\n5,\n",
+     [{'type': 'fill_mode', 'column': 'c'}], lambda df: df.fillna({'c': df['c'].mode()[0]})),
+]
+
+
+def replay(recipe, source, chunksizes):
+    """Output CSV text of the recipe for every chunk size."""
+    outputs = {}
+    for chunksize in chunksizes:
+        fd, destination = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            apply_recipe_to_csv(recipe, source, destination, chunksize)
+            with open(destination) as f:
+                outputs[chunksize] = f.read()
+        finally:
+            os.remove(destination)
+    return outputs
+
+
+def check(name, recipe, source, chunksizes, expected=None):
+    outputs = replay(recipe, source, chunksizes)
+    first = outputs[chunksizes[0]]
+    rows = len(pd.read_csv(io.StringIO(first)))
+    ok = all(output == first for output in outputs.values())
+    if expected is not None and first != expected:
+        ok = False
+        print(f"      in memory: {len(pd.read_csv(io.StringIO(expected)))} rows")
+    print(f"{'ok' if ok else 'FAIL':<5} {name}: {rows} rows")
+    if not ok:
+        for chunksize, output in outputs.items():
+            print(f"      chunksize {chunksize}: {len(pd.read_csv(io.StringIO(output)))} rows")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('recipe', nargs='?')
+    parser.add_argument('source', nargs='?')
+    parser.add_argument('--chunksizes', type=int, nargs='+', default=list(DEFAULT_CHUNKSIZES))
+    args = parser.parse_args()
+
+    if args.recipe:
+        ok = check(args.source, args.recipe, args.source, args.chunksizes)
+    else:
+        ok = True
+        for name, text, operations, clean in CASES:
+            fd, source = tempfile.mkstemp(suffix='.csv')
+            with os.fdopen(fd, 'w') as f:
+                f.write(text)
+            expected = clean(pd.read_csv(io.StringIO(text))).to_csv(index=False)
+            try:
+                ok &= check(name, build_recipe(operations), source, args.chunksizes, expected)
+            finally:
+                os.remove(source)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
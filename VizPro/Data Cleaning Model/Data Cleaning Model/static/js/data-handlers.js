@@ -18,6 +18,8 @@ async function handleFileUpload(file) {
         
         // Ensure data structure
         const processedData = {
+            dataset_id: data.dataset_id,
+            version: data.version,
             preview: sanitizeData(data.preview || []),
             columns: data.columns || [],
             analysis: data.analysis || {},
@@ -53,3 +55,47 @@ function sanitizeData(data) {
 
 // Move all your data operation functions here (applyMissingDataOperation, removeDuplicates, changeDataType, etc.)
 // ...existing code for data operations...
+
+// Windowed preview: fetch one page of rows from the server-side dataset
+const PREVIEW_PAGE_SIZE = 50;
+let previewOffset = 0;
+
+async function loadPreviewWindow(offset) {
+    if (!currentData?.dataset_id) return;
+
+    try {
+        const params = new URLSearchParams({
+            dataset_id: currentData.dataset_id,
+            offset: offset,
+            limit: PREVIEW_PAGE_SIZE
+        });
+        const response = await fetch(`/rows?${params}`);
+        const data = await response.json();
+
+        if (!data.success) throw new Error(data.error || 'Could not load rows');
+
+        previewOffset = data.offset;
+        updateDataPreview(sanitizeData(data.rows));
+        updatePreviewPager(data.total_rows);
+    } catch (error) {
+        showError(error.message);
+        console.error('Preview error:', error);
+    }
+}
+
+function changePreviewPage(direction) {
+    const totalRows = currentData?.total_rows || 0;
+    const offset = previewOffset + direction * PREVIEW_PAGE_SIZE;
+    if (offset < 0 || offset >= totalRows) return;
+    loadPreviewWindow(offset);
+}
+
+function updatePreviewPager(totalRows) {
+    const pager = document.getElementById('previewPager');
+    if (!pager) return;
+
+    pager.style.display = totalRows ? 'flex' : 'none';
+    const last = Math.min(previewOffset + PREVIEW_PAGE_SIZE, totalRows);
+    document.getElementById('previewPageInfo').textContent =
+        `Rows ${previewOffset + 1}-${last} of ${totalRows}`;
+}
@@ -41,6 +41,7 @@ async function handleFileUpload(file) {
         originalData = {...data};
         
         updateUI(data);
+        loadPreviewWindow(0);
         showSuccess('File uploaded and analyzed successfully');
     } catch (error) {
         showError(error.message);
@@ -278,22 +279,13 @@ async function applyMissingDataOperation() {
     }
 
     try {
-        // Sanitize data before sending
-        const cleanData = currentData.preview.map(row => {
-            const cleanRow = {};
-            for (const [key, value] of Object.entries(row)) {
-                cleanRow[key] = value === "NaN" || value === null ? null : value;
-            }
-            return cleanRow;
-        });
-
         const response = await fetch('/clean', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                data: cleanData,
+                dataset_id: currentData.dataset_id,
                 operations: [{
                     type: operation,
                     column: column,
@@ -308,6 +300,8 @@ async function applyMissingDataOperation() {
         // Update current data with sanitized response
         currentData = {
             ...currentData,
+            version: data.version,
+            total_rows: data.total_rows,
             preview: sanitizeResponseData(data.preview),
             analysis: data.analysis
         };
@@ -335,22 +329,13 @@ function sanitizeResponseData(data) {
 // Remove duplicates
 async function removeDuplicates() {
     const selectedColumns = Array.from(document.querySelectorAll('#duplicateColumns input:checked')).map(cb => cb.value);
-    
-    if (selectedColumns.length === 0) {
-        Swal.fire({
-            title: 'Error!',
-            text: 'Please select at least one column',
-            icon: 'error',
-            background: '#1f2937',
-            color: '#fff'
-        });
-        return;
-    }
 
-    const operations = [{
-        type: 'remove_duplicates',
-        columns: selectedColumns
-    }];
+    // With no columns (or all of them) selected whole rows are compared
+    const operations = [
+        selectedColumns.length === 0 || selectedColumns.length === currentData.columns.length
+            ? { type: 'dedupe' }
+            : { type: 'dedupe_on_subset', columns: selectedColumns }
+    ];
 
     try {
         const response = await fetch('/clean', {
@@ -359,7 +344,7 @@ async function removeDuplicates() {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                data: currentData.preview,
+                dataset_id: currentData.dataset_id,
                 operations: operations
             })
         });
@@ -370,7 +355,7 @@ async function removeDuplicates() {
             updateUI(currentData);
             Swal.fire({
                 title: 'Success!',
-                text: 'Duplicates removed successfully',
+                text: `${data.rows_removed} duplicate rows removed`,
                 icon: 'success',
                 background: '#1f2937',
                 color: '#fff'
@@ -418,7 +403,7 @@ async function changeDataType() {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                data: currentData.preview,
+                dataset_id: currentData.dataset_id,
                 operations: operations
             })
         });
@@ -468,7 +453,7 @@ async function downloadData() {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                data: currentData.preview
+                dataset_id: currentData.dataset_id
             })
         });
 
@@ -497,6 +482,21 @@ async function downloadData() {
     }
 }
 
+// Save the operations applied so far as a recipe for apply_recipe.py
+function downloadRecipe() {
+    if (!currentData?.dataset_id) {
+        showError('No data available');
+        return;
+    }
+
+    const a = document.createElement('a');
+    a.href = `/recipe?dataset_id=${encodeURIComponent(currentData.dataset_id)}`;
+    a.download = 'cleaning_recipe.json';
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
+}
+
 // Show/hide custom value input based on operation selection
 document.getElementById('missingDataOperation').addEventListener('change', (e) => {
     const customValueInput = document.getElementById('customValue');
@@ -46,7 +46,7 @@ function generateVisualization() {
     // Prepare visualization request
     const request = {
         type: visType,
-        data: currentData.preview,
+        dataset_id: currentData.dataset_id,
         column: selectedColumn
     };
 
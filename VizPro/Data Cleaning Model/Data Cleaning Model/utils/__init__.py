@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Modules shared with the prediction app live in VizPro/vizpro_common
+_VIZPRO = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if _VIZPRO not in sys.path:
+    sys.path.append(_VIZPRO)
@@ -0,0 +1,371 @@
+import logging
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.row_index import RowHashIndex, duplicated_rows
+
+FILL_OPERATIONS = ('fill_mean', 'fill_median', 'fill_mode', 'fill_value')
+NUMERIC_OPERATIONS = ('fill_mean', 'fill_median', 'interpolate')
+DEDUPE_OPERATIONS = ('dedupe', 'dedupe_on_subset')
+SUPPORTED_OPERATIONS = FILL_OPERATIONS + ('remove_rows', 'ffill', 'bfill', 'interpolate') + DEDUPE_OPERATIONS
+
+# Approximate number of full passes over a column each step makes
+STEP_PASSES = {
+    'coerce_numeric': 1,
+    'fill_mean': 2,
+    'fill_median': 2,
+    'fill_mode': 2,
+    'fill_value': 1,
+    'ffill': 1,
+    'bfill': 1,
+    'interpolate': 2,
+    'remove_rows': 1,
+    'dedupe': 1,
+    'dedupe_on_subset': 1
+}
+
+# Passes the same operation costs when run on its own, re-coercing each time
+NAIVE_PASSES = {
+    'fill_mean': 3,
+    'fill_median': 3,
+    'fill_mode': 2,
+    'fill_value': 1,
+    'ffill': 1,
+    'bfill': 1,
+    'interpolate': 3,
+    'remove_rows': 1,
+    'dedupe': 1,
+    'dedupe_on_subset': 1
+}
+
+
+def operation_columns(op):
+    """Columns an operation needs; an empty list means every column."""
+    if op.get('type') == 'dedupe':
+        return []
+    if op.get('type') == 'dedupe_on_subset':
+        return list(op.get('columns') or [])
+    return [op['column']]
+
+
+def compile_operations(operations):
+    """Compile a /clean operation list into a reusable CleaningPlan.
+
+    The plan is independent of any particular dataset: column lookups and
+    aggregates happen when it is executed.
+    """
+    stages = []
+    rejected = []
+    stage = _new_stage()
+    coerced = set()
+
+    for index, op in enumerate(operations):
+        if isinstance(op, dict) and op.get('type') in DEDUPE_OPERATIONS:
+            subset = op.get('columns')
+            if op['type'] == 'dedupe_on_subset' and (not isinstance(subset, list) or not subset):
+                rejected.append({
+                    'type': op['type'],
+                    'error': 'A non-empty list of columns is required'
+                })
+                continue
+            # Duplicates are judged on the rows as they stand after the
+            # operations before it, so it ends the stage
+            if stage['dedupe']:
+                stages.append(stage)
+                stage = _new_stage()
+            stage['dedupe'] = (index, subset if op['type'] == 'dedupe_on_subset' else None)
+            continue
+
+        if not isinstance(op, dict) or not all(key in op for key in ['type', 'column']):
+            rejected.append({
+                'type': op.get('type', 'unknown') if isinstance(op, dict) else 'unknown',
+                'error': 'Missing required parameters'
+            })
+            continue
+        if op['type'] not in SUPPORTED_OPERATIONS:
+            rejected.append({
+                'type': op['type'],
+                'column': op['column'],
+                'error': 'Unsupported operation'
+            })
+            continue
+        if op['type'] == 'fill_value' and op.get('value') is None:
+            rejected.append({
+                'type': op['type'],
+                'column': op['column'],
+                'error': 'A fill value is required'
+            })
+            continue
+
+        column = op['column']
+        if op['type'] == 'remove_rows':
+            if stage['dedupe']:
+                stages.append(stage)
+                stage = _new_stage()
+            stage['remove_rows'].append((index, column))
+            continue
+
+        # Dropping rows changes every later aggregate, so it closes the stage
+        if stage['remove_rows'] or stage['dedupe']:
+            stages.append(stage)
+            stage = _new_stage()
+
+        steps = stage['columns'].setdefault(column, [])
+        if op['type'] in NUMERIC_OPERATIONS and column not in coerced:
+            steps.append({'step': 'coerce_numeric', 'op': index})
+            coerced.add(column)
+        steps.append({'step': op['type'], 'op': index})
+
+    if stage['columns'] or stage['remove_rows'] or stage['dedupe']:
+        stages.append(stage)
+    return CleaningPlan(operations, stages, rejected)
+
+
+def _new_stage():
+    return {'columns': OrderedDict(), 'remove_rows': [], 'dedupe': None}
+
+
+class CleaningPlan:
+    """A compiled list of cleaning operations.
+
+    Operations are grouped into stages separated by row removals. A column
+    is coerced to numeric at most once, fills that can no longer change
+    anything are skipped, the final constant fill of every column in a
+    stage is applied with a single ``fillna`` and consecutive
+    ``remove_rows`` are merged into one ``dropna``. De-duplication ends a
+    stage and compares 64-bit row hashes instead of the rows themselves.
+    """
+
+    def __init__(self, operations, stages, rejected):
+        self.operations = list(operations)
+        self.stages = stages
+        self.rejected = rejected
+
+    def execute(self, df, row_index=None):
+        """Run the plan on ``df`` without modifying it.
+
+        Returns the cleaned DataFrame and the list of failed operations in
+        the same shape /clean has always reported them. When ``row_index``
+        (a RowHashIndex built for ``df``) is given, de-duplication reuses
+        its hashes for every column the plan has not modified.
+        """
+        df = df.copy(deep=False)
+        failed = list(self.rejected)
+        modified = set()
+
+        for stage in self.stages:
+            bulk_fills = {}
+            for column, steps in stage['columns'].items():
+                if column not in df.columns:
+                    failed.extend(self._fail(steps, column, 'Column not found'))
+                    continue
+                series, fill_value = self._run_column(df[column], column, steps, failed)
+                if fill_value is not None:
+                    bulk_fills[column] = fill_value
+                df[column] = series
+                modified.add(column)
+
+            for column, value in list(bulk_fills.items()):
+                if _needs_category(df[column], value):
+                    if df[column].isna().any():
+                        df[column] = df[column].cat.add_categories([value])
+                    else:
+                        del bulk_fills[column]
+            if bulk_fills:
+                df = df.fillna(bulk_fills)
+
+            subset = []
+            for index, column in stage['remove_rows']:
+                if column not in df.columns:
+                    failed.append({'type': 'remove_rows', 'column': column, 'error': 'Column not found'})
+                elif column not in subset:
+                    subset.append(column)
+            if subset:
+                df = df.dropna(subset=subset)
+
+            if stage['dedupe']:
+                df = self._dedupe(df, stage['dedupe'], row_index, modified, failed)
+
+        return df, failed
+
+    def _dedupe(self, df, dedupe, row_index, modified, failed):
+        index, subset = dedupe
+        op = self.operations[index]
+        columns = subset if subset is not None else list(df.columns)
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            failed.append({'type': op['type'], 'columns': columns, 'error': f'Columns not found: {missing}'})
+            return df
+
+        if row_index is None:
+            row_index = RowHashIndex(df[columns])
+            modified = ()
+        hashes = row_index.hashes_for(df, columns, fresh=modified)
+        return df[~duplicated_rows(df, hashes, columns)]
+
+    def _run_column(self, series, column, steps, failed):
+        """Apply one column's steps, deferring a trailing constant fill."""
+        complete = False
+        for position, step in enumerate(steps):
+            op = self.operations[step['op']]
+            name = step['step']
+            try:
+                if name == 'coerce_numeric':
+                    if not pd.api.types.is_numeric_dtype(series):
+                        series = pd.to_numeric(series, errors='coerce')
+                        complete = False
+                    continue
+
+                # Nothing left to fill once a constant fill has succeeded
+                if complete:
+                    continue
+
+                if name in FILL_OPERATIONS:
+                    value = self._fill_value(series, op)
+                    if pd.isna(value):
+                        continue
+                    if position == len(steps) - 1:
+                        return series, value
+                    if _needs_category(series, value):
+                        if not series.isna().any():
+                            complete = True
+                            continue
+                        series = series.cat.add_categories([value])
+                    series = series.fillna(value)
+                    complete = True
+                elif name == 'ffill':
+                    series = series.ffill()
+                elif name == 'bfill':
+                    series = series.bfill()
+                elif name == 'interpolate':
+                    series = series.interpolate(method='linear')
+            except Exception as e:
+                failed.append({'type': op['type'], 'column': column, 'error': str(e)})
+                logging.error(f"Error in operation {op['type']}: {str(e)}")
+        return series, None
+
+    @staticmethod
+    def _fill_value(series, op):
+        kind = op['type']
+        if kind == 'fill_value':
+            return op['value']
+
+        if kind == 'fill_mode':
+            mode = series.mode()
+            if mode.empty:
+                raise ValueError("Cannot calculate mode of an empty column")
+            return mode.iloc[0]
+
+        # Mean and median come from one extraction of the non-null values
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if kind == 'fill_mean':
+            if values.size == 0:
+                raise ValueError("Cannot calculate mean of non-numeric data")
+            return float(values.mean())
+        return float(np.median(values)) if values.size else np.nan
+
+    @staticmethod
+    def _fail(steps, column, error):
+        seen = set()
+        failures = []
+        for step in steps:
+            if step['step'] != 'coerce_numeric' and step['op'] not in seen:
+                seen.add(step['op'])
+                failures.append({'type': step['step'], 'column': column, 'error': error})
+        return failures
+
+    def explain(self, df=None):
+        """Describe the fused steps and their estimated cost.
+
+        Costs are counted in column passes; when ``df`` is given they are
+        also expressed in cells touched for that dataset.
+        """
+        steps = []
+        fused = 0
+        for number, stage in enumerate(self.stages, start=1):
+            for column, column_steps in stage['columns'].items():
+                live = _live_steps(column_steps)
+                for step in column_steps:
+                    passes = STEP_PASSES[step['step']] if step in live else 0
+                    fused += passes
+                    steps.append({
+                        'stage': number,
+                        'column': column,
+                        'step': step['step'],
+                        'operation': step['op'],
+                        'passes': passes,
+                        'note': _step_note(step, live, column_steps)
+                    })
+            if stage['remove_rows']:
+                subset = list(OrderedDict.fromkeys(column for _, column in stage['remove_rows']))
+                fused += len(subset)
+                steps.append({
+                    'stage': number,
+                    'column': subset,
+                    'step': 'remove_rows',
+                    'operation': [index for index, _ in stage['remove_rows']],
+                    'passes': len(subset),
+                    'note': 'single dropna over all columns' if len(subset) > 1 else ''
+                })
+            if stage['dedupe']:
+                index, subset = stage['dedupe']
+                fused += STEP_PASSES[self.operations[index]['type']]
+                steps.append({
+                    'stage': number,
+                    'column': subset if subset is not None else 'all',
+                    'step': self.operations[index]['type'],
+                    'operation': index,
+                    'passes': STEP_PASSES[self.operations[index]['type']],
+                    'note': 'compares stored row hashes; only modified columns are rehashed'
+                })
+
+        naive = sum(NAIVE_PASSES.get(op.get('type'), 0) for op in self.operations
+                    if isinstance(op, dict))
+        cost = {'fused_passes': fused, 'naive_passes': naive}
+        if df is not None:
+            cost.update({
+                'rows': len(df),
+                'fused_cells': fused * len(df),
+                'naive_cells': naive * len(df)
+            })
+
+        return {
+            'stages': len(self.stages),
+            'steps': steps,
+            'rejected': self.rejected,
+            'estimated_cost': cost
+        }
+
+
+def _needs_category(series, value):
+    """True if filling a categorical column with ``value`` needs a new category."""
+    return isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories
+
+
+def _live_steps(steps):
+    """Steps that still do work, assuming every fill succeeds."""
+    live = []
+    complete = False
+    for step in steps:
+        if step['step'] == 'coerce_numeric':
+            complete = False
+        elif complete:
+            continue
+        elif step['step'] in FILL_OPERATIONS:
+            complete = True
+        live.append(step)
+    return live
+
+
+def _step_note(step, live, steps):
+    if step not in live:
+        return 'skipped: column already filled'
+    if step['step'] == 'coerce_numeric':
+        users = sum(1 for s in steps if s['step'] in NUMERIC_OPERATIONS)
+        return f'shared by {users} numeric operations' if users > 1 else ''
+    if step['step'] in FILL_OPERATIONS and step is steps[-1]:
+        return 'applied in bulk fillna'
+    return ''
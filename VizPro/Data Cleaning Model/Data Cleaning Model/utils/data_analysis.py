@@ -1,36 +1,171 @@
 import numpy as np
 import pandas as pd
 
-def analyze_columns(df):
-    """Analyze DataFrame columns and return comprehensive statistics."""
-    try:
-        analysis = {
-            'data_types': df.dtypes.astype(str).to_dict(),
-            'missing_values': df.isnull().sum().to_dict(),
-            'unique_counts': df.nunique().to_dict(),
-            'numeric_columns': df.select_dtypes(include=[np.number]).columns.tolist(),
-            'categorical_columns': df.select_dtypes(include=['object']).columns.tolist(),
-            'column_stats': {}
-        }
+# Above this many rows medians and numeric distinct counts are estimated
+APPROX_ROW_THRESHOLD = 200000
+# Rows sampled for approximate medians
+QUANTILE_SAMPLE_SIZE = 100000
+# Number of minimum hash values kept by the distinct count sketch
+DISTINCT_SKETCH_SIZE = 2048
 
-        # Analyze numeric columns
-        for col in analysis['numeric_columns']:
-            if not df[col].isnull().all():
-                analysis['column_stats'][col] = {
-                    'mean': float(df[col].mean()),
-                    'median': float(df[col].median()),
-                    'std': float(df[col].std()),
-                    'min': float(df[col].min()),
-                    'max': float(df[col].max())
-                }
-
-        # Analyze categorical columns
-        for col in analysis['categorical_columns']:
-            analysis['column_stats'][col] = {
-                'top_values': df[col].value_counts().head(5).to_dict()
-            }
+def analyze_columns(df, approx_threshold=APPROX_ROW_THRESHOLD):
+    """Analyze DataFrame columns and return comprehensive statistics.
 
-        return analysis
+    Numeric statistics and missing counts are computed together over one
+    float matrix, and each categorical column is counted once for its
+    missing count, distinct count and top values. Frames longer than
+    ``approx_threshold`` rows get sampled medians and sketched numeric
+    distinct counts.
+    """
+    try:
+        profiles = profile_columns(df, df.columns, approx_threshold)
+        return assemble_analysis(df, profiles, len(df) > approx_threshold)
     except Exception as e:
         print(f"Error in analyze_columns: {str(e)}")
         return None
+
+def profile_columns(df, columns, approx_threshold=APPROX_ROW_THRESHOLD):
+    """Profile the given columns of ``df``.
+
+    Returns ``{column: {'data_type', 'kind', 'missing', 'unique', 'stats'}}``
+    so results can be cached per column and reassembled later.
+    """
+    approximate = len(df) > approx_threshold
+    subset = df[list(columns)]
+    numeric_columns = subset.select_dtypes(include=[np.number]).columns.tolist()
+    categorical_columns = subset.select_dtypes(include=['object', 'category']).columns.tolist()
+
+    profiles = {}
+    profile_numeric(df, numeric_columns, profiles, approximate)
+    profile_categorical(df, categorical_columns, profiles)
+
+    # Remaining columns (datetimes, booleans, categories) are counted directly
+    for col in columns:
+        if col not in profiles:
+            profiles[col] = {
+                'kind': 'other',
+                'missing': int(df[col].isnull().sum()),
+                'unique': int(df[col].nunique()),
+                'stats': None
+            }
+        profiles[col]['data_type'] = str(df[col].dtype)
+    return profiles
+
+def assemble_analysis(df, profiles, approximate=False):
+    """Build the analyze_columns result from per-column profiles."""
+    columns = df.columns
+    column_stats = {}
+    for col in columns:
+        if profiles[col]['stats'] is not None:
+            column_stats[col] = profiles[col]['stats']
+
+    return {
+        'data_types': {col: profiles[col]['data_type'] for col in columns},
+        'missing_values': {col: profiles[col]['missing'] for col in columns},
+        'unique_counts': {col: profiles[col]['unique'] for col in columns},
+        'numeric_columns': [col for col in columns if profiles[col]['kind'] == 'numeric'],
+        'categorical_columns': [col for col in columns if profiles[col]['kind'] == 'categorical'],
+        'column_stats': column_stats,
+        'approximate': approximate
+    }
+
+def profile_numeric(df, columns, profiles, approximate=False):
+    """Profile numeric columns from one float matrix."""
+    if not columns:
+        return
+    values = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    stats = numeric_stats(values, columns, approximate)
+    missing = np.count_nonzero(np.isnan(values), axis=0)
+
+    for i, col in enumerate(columns):
+        if approximate:
+            unique = estimate_distinct(values[:, i])
+        else:
+            unique = int(df[col].nunique())
+        profiles[col] = {
+            'kind': 'numeric',
+            'missing': int(missing[i]),
+            'unique': unique,
+            'stats': stats.get(col)
+        }
+
+def numeric_stats(values, columns, approximate=False):
+    """Mean, median, std, min and max for every column of a float matrix."""
+    counts = np.count_nonzero(~np.isnan(values), axis=0)
+    present = counts > 0
+    if not present.any():
+        return {}
+
+    block = values[:, present]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.nanmean(block, axis=0)
+        stds = np.nanstd(block, axis=0, ddof=1)
+    mins = np.nanmin(block, axis=0)
+    maxs = np.nanmax(block, axis=0)
+
+    if approximate and len(block) > QUANTILE_SAMPLE_SIZE:
+        rng = np.random.default_rng(0)
+        sample = block[rng.choice(len(block), QUANTILE_SAMPLE_SIZE, replace=False)]
+        # A column can be sparse enough to miss the sample entirely
+        medians = np.array([
+            np.nanmedian(sample[:, i]) if not np.isnan(sample[:, i]).all()
+            else np.nanmedian(block[:, i])
+            for i in range(block.shape[1])
+        ])
+    else:
+        medians = np.nanmedian(block, axis=0)
+
+    stats = {}
+    for i, col in enumerate(np.asarray(columns, dtype=object)[present]):
+        stats[col] = {
+            'mean': float(means[i]),
+            'median': float(medians[i]),
+            'std': float(stds[i]),
+            'min': float(mins[i]),
+            'max': float(maxs[i])
+        }
+    return stats
+
+def profile_categorical(df, columns, profiles):
+    """Missing count, distinct count and top values from one value_counts."""
+    for col in columns:
+        counts = df[col].value_counts()
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            # Categories no longer present in any row are listed with zero counts
+            counts = counts[counts > 0]
+        profiles[col] = {
+            'kind': 'categorical',
+            'missing': int(len(df) - counts.sum()),
+            'unique': int(len(counts)),
+            'stats': {'top_values': counts.head(5).to_dict()}
+        }
+
+def estimate_distinct(values, k=DISTINCT_SKETCH_SIZE):
+    """Estimate the number of distinct non-NaN floats with a KMV sketch.
+
+    The values are hashed and the k smallest distinct hashes are kept; the
+    k-th smallest one tells how densely the hash space is populated.
+    """
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return 0
+    # Fold -0.0 into 0.0 so equal floats hash alike
+    values = values + 0.0
+    hashes = mix64(values.view(np.uint64))
+
+    if hashes.size > 4 * k:
+        hashes = np.partition(hashes, 4 * k)[:4 * k]
+    smallest = np.unique(hashes)
+    if smallest.size < k:
+        if hashes.size == values.size:
+            return int(smallest.size)
+        # Too many duplicates among the kept hashes to read the sketch
+        return int(len(np.unique(values)))
+    return int(round((k - 1) / (float(smallest[k - 1]) / 2.0 ** 64)))
+
+def mix64(x):
+    """SplitMix64 finalizer, spreading bit patterns uniformly over uint64."""
+    with np.errstate(over='ignore'):
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
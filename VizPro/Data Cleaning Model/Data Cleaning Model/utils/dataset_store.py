@@ -0,0 +1,119 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from utils.profile_cache import ProfileCache
+from utils.row_index import RowHashIndex
+
+
+class DatasetEntry:
+    """A DataFrame held server-side together with its bookkeeping."""
+
+    def __init__(self, dataset_id, df, filename=None, source_key=None):
+        self.dataset_id = dataset_id
+        self.df = df
+        self.filename = filename
+        # Content hash of the uploaded file, when known
+        self.source_key = source_key
+        self.version = 1
+        self.created = time.time()
+        self.updated = self.created
+        # Sorted row orders for /rows, valid for the current version only
+        self.order_cache = {}
+        # Operations applied so far, saved as a replayable recipe
+        self.history = []
+        # Column profiles and row hashes, refreshed only where edits land
+        self.profile = ProfileCache()
+        self.row_index = RowHashIndex(df)
+
+    def analysis(self):
+        """Column analysis of the current version, reusing clean profiles."""
+        try:
+            return self.profile.analysis(self.df)
+        except Exception as e:
+            print(f"Error in analyze_columns: {str(e)}")
+            return None
+
+    def fingerprint(self):
+        """Identifies the current data, e.g. for caching figures drawn from it.
+
+        Unedited uploads of the same file share the fingerprint of its
+        content; every edit yields a new one.
+        """
+        if self.version == 1 and self.source_key:
+            return self.source_key
+        return f"{self.dataset_id}-v{self.version}"
+
+    def duplicate_count(self, columns=None):
+        """Number of duplicated rows, read from the row-hash index."""
+        return self.row_index.duplicate_count(self.df, columns)
+
+    def summary(self):
+        return {
+            'dataset_id': self.dataset_id,
+            'filename': self.filename,
+            'version': self.version,
+            'total_rows': len(self.df),
+            'total_columns': len(self.df.columns)
+        }
+
+
+class DatasetStore:
+    """Thread-safe in-memory store of uploaded datasets keyed by handle.
+
+    Least recently used datasets are dropped once more than
+    ``max_datasets`` are held.
+    """
+
+    def __init__(self, max_datasets=20):
+        self.max_datasets = max_datasets
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, df, filename=None, source_key=None):
+        """Store a DataFrame and return its new entry."""
+        entry = DatasetEntry(uuid.uuid4().hex, df, filename, source_key)
+        with self._lock:
+            self._entries[entry.dataset_id] = entry
+            while len(self._entries) > self.max_datasets:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get(self, dataset_id):
+        """Return the entry for a handle, raising KeyError if unknown."""
+        with self._lock:
+            if dataset_id not in self._entries:
+                raise KeyError(f"Unknown dataset: {dataset_id}")
+            self._entries.move_to_end(dataset_id)
+            return self._entries[dataset_id]
+
+    def update(self, dataset_id, df, operations=(), changed_columns=None):
+        """Replace the DataFrame behind a handle and bump its version.
+
+        ``changed_columns`` lists the columns whose values may differ from
+        the previous version; cached profiles and row hashes of the other
+        columns are kept. ``None`` means anything may have changed.
+        """
+        entry = self.get(dataset_id)
+        with self._lock:
+            entry.df = df
+            entry.profile.invalidate(changed_columns)
+            entry.row_index.update(df, changed_columns)
+            entry.history.extend(operations)
+            entry.version += 1
+            entry.updated = time.time()
+            entry.order_cache = {}
+        return entry
+
+    def remove(self, dataset_id):
+        with self._lock:
+            return self._entries.pop(dataset_id, None) is not None
+
+    def __contains__(self, dataset_id):
+        with self._lock:
+            return dataset_id in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
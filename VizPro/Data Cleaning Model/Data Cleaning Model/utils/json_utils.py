@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 import json
 
 class NumpyEncoder(json.JSONEncoder):
@@ -24,3 +25,70 @@ def serialize_numpy(obj):
     elif isinstance(obj, (list, tuple)):
         return [serialize_numpy(i) for i in obj]
     return obj
+
+def _column_to_list(series):
+    """Convert one column to a list of JSON-safe values in a single pass.
+
+    NaN, NaT and +/-inf become None, timestamps become strings and numpy
+    scalars become native Python numbers.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        if isinstance(dtype, np.dtype):
+            return series.to_numpy().tolist()
+        # Nullable extension dtypes (Int64, boolean) carry pd.NA
+        return series.to_numpy(dtype=object, na_value=None).tolist()
+
+    if pd.api.types.is_float_dtype(dtype):
+        if dtype == np.float32:
+            # Widen through the shortest repr so 16.9 stays 16.9
+            values = series.to_numpy().astype(str).astype(np.float64)
+        else:
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        mask = ~np.isfinite(values)
+        if not mask.any():
+            return values.tolist()
+        out = values.astype(object)
+        out[mask] = None
+        return out.tolist()
+
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        mask = series.isna().to_numpy()
+        out = series.astype(str).to_numpy(dtype=object)
+        out[mask] = None
+        return out.tolist()
+
+    values = series.to_numpy(dtype=object)
+    mask = pd.isna(values)
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind in ('floating', 'mixed-integer-float', 'mixed'):
+        mask |= np.isin(values, [np.inf, -np.inf])
+    out = values.copy()
+    out[mask] = None
+    if kind not in ('string', 'empty'):
+        # Mixed object columns: only the odd values need per-item handling
+        for i in np.flatnonzero(~mask):
+            value = out[i]
+            if isinstance(value, (np.generic, pd.Timestamp)):
+                out[i] = value.item() if isinstance(value, np.generic) else str(value)
+    return out.tolist()
+
+def dataframe_to_json(df, orient='records'):
+    """Serialize a DataFrame column by column into JSON-safe Python objects.
+
+    ``orient='records'`` returns a list of row dicts; ``orient='columns'``
+    returns ``{'columns': [...], 'data': {column: [values]}}``, which is
+    cheaper to build and to send for wide previews.
+    """
+    columns = [str(col) for col in df.columns]
+    data = [_column_to_list(series) for _, series in df.items()]
+
+    if orient == 'columns':
+        return {
+            'columns': columns,
+            'length': len(df),
+            'data': dict(zip(columns, data))
+        }
+    if orient != 'records':
+        raise ValueError(f"Unsupported orient: {orient}")
+    return [dict(zip(columns, row)) for row in zip(*data)]
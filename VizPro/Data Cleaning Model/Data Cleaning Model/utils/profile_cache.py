@@ -0,0 +1,34 @@
+from utils.data_analysis import APPROX_ROW_THRESHOLD, profile_columns, assemble_analysis
+
+
+class ProfileCache:
+    """Per-column profiles of one dataset, recomputed only when dirty."""
+
+    def __init__(self, approx_threshold=APPROX_ROW_THRESHOLD):
+        self.approx_threshold = approx_threshold
+        self.profiles = {}
+        self.rows = None
+
+    def invalidate(self, columns=None):
+        """Mark columns (or everything, if None) as needing a new profile."""
+        if columns is None:
+            self.profiles = {}
+        else:
+            for column in columns:
+                self.profiles.pop(column, None)
+
+    def analysis(self, df):
+        """Return analyze_columns output, profiling only stale columns."""
+        # Statistics of every column depend on which rows are present
+        if self.rows != len(df):
+            self.profiles = {}
+            self.rows = len(df)
+
+        stale = [col for col in df.columns if col not in self.profiles]
+        if stale:
+            self.profiles.update(profile_columns(df, stale, self.approx_threshold))
+        for col in list(self.profiles):
+            if col not in df.columns:
+                del self.profiles[col]
+
+        return assemble_analysis(df, self.profiles, len(df) > self.approx_threshold)
@@ -0,0 +1,415 @@
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.cleaning_pipeline import (
+    DEDUPE_OPERATIONS, NUMERIC_OPERATIONS, compile_operations, operation_columns
+)
+from utils.row_index import RowHashIndex
+
+RECIPE_FORMAT = 'vizpro-cleaning-recipe'
+RECIPE_VERSION = 1
+DEFAULT_CHUNKSIZE = 100000
+
+AGGREGATE_OPERATIONS = ('fill_mean', 'fill_median', 'fill_mode')
+
+# Medians of larger columns are estimated from a uniform sample of this size
+MEDIAN_SAMPLE_SIZE = 1000000
+
+
+def build_recipe(operations, source=None):
+    """Wrap an operation list in the recipe format saved by the UI."""
+    return {
+        'format': RECIPE_FORMAT,
+        'version': RECIPE_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'source': source,
+        'operations': list(operations)
+    }
+
+
+def load_recipe(recipe):
+    """Validate a recipe given as a dict, JSON text or file path.
+
+    Strings not starting with '{' are opened as paths, so only trusted
+    callers such as the CLI may pass text; the web app passes a dict.
+    """
+    if isinstance(recipe, str):
+        if recipe.lstrip().startswith('{'):
+            recipe = json.loads(recipe)
+        else:
+            with open(recipe) as f:
+                recipe = json.load(f)
+
+    if not isinstance(recipe, dict) or recipe.get('format') != RECIPE_FORMAT:
+        raise ValueError("Not a cleaning recipe")
+    if recipe.get('version') != RECIPE_VERSION:
+        raise ValueError(f"Unsupported recipe version: {recipe.get('version')}")
+
+    rejected = compile_operations(recipe.get('operations', [])).rejected
+    if rejected:
+        raise ValueError(f"Invalid recipe operations: {rejected}")
+    return recipe
+
+
+def apply_recipe_to_csv(recipe, source, destination, chunksize=DEFAULT_CHUNKSIZE):
+    """Replay a recipe over a CSV file in chunks and write the result.
+
+    Aggregate fills (mean, median, mode) are resolved by statistics passes
+    over the file before the output pass; a pass resolves every aggregate
+    that does not depend on another unresolved one, so most recipes need a
+    single statistics pass. ``ffill``, ``bfill`` and ``interpolate`` carry
+    state across chunk boundaries, which keeps memory bounded by the chunk
+    size plus the longest run of missing values they have to bridge.
+    A first pass fixes the dtype of every column, so each chunk parses its
+    values the way a read of the whole file would.
+    """
+    recipe = load_recipe(recipe)
+    started = time.perf_counter()
+
+    header = pd.read_csv(source, nrows=0).columns
+    operations = []
+    failed = []
+    for op in recipe['operations']:
+        missing = [c for c in operation_columns(op) if c not in header]
+        if op['type'] in DEDUPE_OPERATIONS and missing:
+            failed.append({'type': op['type'], 'columns': op.get('columns'),
+                           'error': f'Columns not found: {missing}'})
+        elif missing:
+            failed.append({'type': op['type'], 'column': op['column'], 'error': 'Column not found'})
+        else:
+            operations.append(op)
+
+    dtypes = _column_dtypes(source, chunksize)
+    values = {}
+    passes = 0
+    while True:
+        taps, cutoff = _plan_statistics_pass(operations, values)
+        if not taps:
+            break
+        passes += 1
+        stream = _apply_operations(_read_chunks(source, chunksize, dtypes), operations[:cutoff], values, taps)
+        for _ in stream:
+            pass
+        for index, accumulator in taps.items():
+            op = operations[index]
+            try:
+                values[index] = accumulator.result()
+            except ValueError as e:
+                values[index] = None
+                failed.append({'type': op['type'], 'column': op['column'], 'error': str(e)})
+
+    rows_out = 0
+    counter = _RowCounter(_read_chunks(source, chunksize, dtypes))
+    with open(destination, 'w', newline='') as out:
+        first = True
+        for chunk in _apply_operations(counter, operations, values):
+            chunk.to_csv(out, index=False, header=first)
+            first = False
+            rows_out += len(chunk)
+        if first:
+            pd.DataFrame(columns=header).to_csv(out, index=False)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'rows_in': counter.rows,
+        'rows_out': rows_out,
+        'statistics_passes': passes,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(counter.rows / elapsed) if elapsed else None,
+        'statistics': [
+            {'type': operations[i]['type'], 'column': operations[i]['column'], 'value': _to_native(v)}
+            for i, v in sorted(values.items())
+        ],
+        'failed_operations': failed
+    }
+
+
+def _read_chunks(source, chunksize, dtypes=None):
+    return pd.read_csv(source, chunksize=chunksize, dtype=dtypes)
+
+
+def _column_dtypes(source, chunksize):
+    """Dtypes that make every chunk parse a column like the whole file would.
+
+    A chunk on its own infers each column from its rows only: a text
+    column with no values in it reads as float64, and an integer column
+    with a gap as float64 while the other chunks read int64. Columns with
+    numbers in every non-empty chunk become float64 unless they are whole
+    and never missing; anything else with mixed chunks is read as text.
+    """
+    kinds = {}
+    gaps = set()
+    for chunk in _read_chunks(source, chunksize):
+        for column in chunk.columns:
+            missing = chunk[column].isna()
+            if missing.any():
+                gaps.add(column)
+            if not missing.all():
+                # An empty column says nothing about its type
+                kinds.setdefault(column, set()).add(chunk[column].dtype.kind)
+
+    dtypes = {}
+    for column in pd.read_csv(source, nrows=0).columns:
+        found = kinds.get(column, set())
+        if len(found) == 1 and column not in gaps and found <= set('iub'):
+            continue
+        dtypes[column] = np.float64 if found <= set('iuf') else object
+    return dtypes
+
+
+class _RowCounter:
+    """Pass chunks through while counting the rows read."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.rows = 0
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.rows += len(chunk)
+            yield chunk
+
+
+def _plan_statistics_pass(operations, values):
+    """Pick the unresolved aggregates that one pass over the file can settle.
+
+    An aggregate has to wait for a later pass if an earlier unresolved
+    aggregate touches the same column; a ``remove_rows`` on such a column
+    makes the row set uncertain, so the pass stops there. So does a
+    de-duplication that compares such a column.
+    """
+    taps = {}
+    blocked = set()
+    for index, op in enumerate(operations):
+        if op['type'] in DEDUPE_OPERATIONS:
+            compared = operation_columns(op)
+            if blocked and (not compared or blocked.intersection(compared)):
+                return taps, index
+            continue
+
+        column = op['column']
+        if op['type'] in AGGREGATE_OPERATIONS and index not in values:
+            if column not in blocked:
+                taps[index] = _ACCUMULATORS[op['type']]()
+                blocked.add(column)
+        elif op['type'] == 'remove_rows' and column in blocked:
+            return taps, index
+    return taps, len(operations)
+
+
+def _apply_operations(chunks, operations, values, taps=None):
+    """Chain one streaming stage per operation over an iterator of chunks."""
+    stream = iter(chunks)
+    taps = taps or {}
+    for index, op in enumerate(operations):
+        if op['type'] in DEDUPE_OPERATIONS:
+            stream = _dedupe_stage(stream, operation_columns(op))
+            continue
+
+        column = op['column']
+        if op['type'] in NUMERIC_OPERATIONS:
+            stream = _coerce_stage(stream, column)
+
+        if index in taps:
+            stream = _tap_stage(stream, column, taps[index])
+        elif op['type'] in AGGREGATE_OPERATIONS:
+            stream = _fill_stage(stream, column, values.get(index))
+        elif op['type'] == 'fill_value':
+            stream = _fill_stage(stream, column, op['value'])
+        elif op['type'] == 'remove_rows':
+            stream = _dropna_stage(stream, column)
+        elif op['type'] == 'ffill':
+            stream = _ffill_stage(stream, column)
+        elif op['type'] == 'bfill':
+            stream = _bfill_stage(stream, column)
+        elif op['type'] == 'interpolate':
+            stream = _interpolate_stage(stream, column)
+    return stream
+
+
+def _coerce_stage(stream, column):
+    for chunk in stream:
+        if not pd.api.types.is_numeric_dtype(chunk[column]):
+            chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+        yield chunk
+
+
+def _tap_stage(stream, column, accumulator):
+    for chunk in stream:
+        accumulator.update(chunk[column])
+        yield chunk
+
+
+def _fill_stage(stream, column, value):
+    # Every chunk reads the column with the dtype fixed by _column_dtypes,
+    # so the value is written as 7 in all of them, not 7.0 where the column
+    # happened to be empty (and float64)
+    for chunk in stream:
+        if value is not None:
+            chunk[column] = chunk[column].fillna(value)
+        yield chunk
+
+
+def _dropna_stage(stream, column):
+    for chunk in stream:
+        chunk.dropna(subset=[column], inplace=True)
+        yield chunk
+
+
+def _dedupe_stage(stream, columns):
+    # Hashes of every row kept so far. A set of Python ints costs roughly
+    # 100 bytes per distinct row, so memory grows with the distinct rows.
+    # Without the rows themselves, equal hashes count as equal rows; values
+    # hash alike whatever dtype their chunk gave the column, while 1 and
+    # '1' still differ
+    seen = set()
+    for chunk in stream:
+        if chunk.empty:
+            yield chunk
+            continue
+        subset = chunk[columns] if columns else chunk
+        hashes = RowHashIndex(subset).row_hashes
+        first = ~pd.Series(hashes).duplicated().to_numpy()
+        first &= ~np.fromiter((h in seen for h in hashes.tolist()), dtype=bool, count=len(hashes))
+        seen.update(hashes[first].tolist())
+        chunk = chunk[first].copy() if not first.all() else chunk
+        yield chunk
+
+
+def _ffill_stage(stream, column):
+    last = None
+    for chunk in stream:
+        series = chunk[column].ffill()
+        if last is not None:
+            series = series.fillna(last)
+        valid = np.flatnonzero(series.notna().to_numpy())
+        if valid.size:
+            last = series.iat[valid[-1]]
+        chunk[column] = series
+        yield chunk
+
+
+def _bfill_stage(stream, column):
+    # Rows after the last value of a chunk wait for the next value to arrive
+    pending = None
+    for chunk in stream:
+        if pending is not None:
+            chunk = pd.concat([pending, chunk])
+        chunk[column] = chunk[column].bfill()
+        valid = np.flatnonzero(chunk[column].notna().to_numpy())
+        cut = valid[-1] + 1 if valid.size else 0
+        pending = chunk.iloc[cut:] if cut < len(chunk) else None
+        if cut:
+            yield chunk.iloc[:cut].copy() if pending is not None else chunk
+    if pending is not None:
+        yield pending.copy()
+
+
+def _interpolate_stage(stream, column):
+    # Linear interpolation needs the last value before and the first value
+    # after a gap; gaps at the end of a chunk are held back until then
+    pending = None
+    last = None
+    for chunk in stream:
+        if pending is not None:
+            chunk = pd.concat([pending, chunk])
+        values = chunk[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        padded = values if last is None else np.concatenate([[last], values])
+        filled = pd.Series(padded).interpolate(method='linear', limit_area='inside').to_numpy()
+        chunk[column] = filled if last is None else filled[1:]
+
+        valid = np.flatnonzero(~np.isnan(values))
+        if valid.size:
+            last = values[valid[-1]]
+            cut = valid[-1] + 1
+        else:
+            cut = 0 if last is not None else len(chunk)
+        pending = chunk.iloc[cut:] if cut < len(chunk) else None
+        if cut:
+            yield chunk.iloc[:cut].copy() if pending is not None else chunk
+    if pending is not None:
+        # Like pandas, trailing gaps take the last known value
+        if last is not None:
+            pending = pending.copy()
+            pending[column] = pending[column].fillna(last)
+        yield pending
+
+
+class _MeanAccumulator:
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        self.total += values.sum()
+        self.count += values.size
+
+    def result(self):
+        if not self.count:
+            raise ValueError("Cannot calculate mean of non-numeric data")
+        return self.total / self.count
+
+
+class _MedianAccumulator:
+    """Exact median up to MEDIAN_SAMPLE_SIZE values, reservoir estimate beyond."""
+
+    def __init__(self, capacity=MEDIAN_SAMPLE_SIZE, seed=42):
+        self.capacity = capacity
+        self.sample = np.empty(0)
+        self.seen = 0
+        self.rng = np.random.default_rng(seed)
+
+    def update(self, series):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        room = self.capacity - self.sample.size
+        if room > 0:
+            self.sample = np.concatenate([self.sample, values[:room]])
+            self.seen += min(room, values.size)
+            values = values[room:]
+        if values.size:
+            # Algorithm R, vectorized over the chunk
+            positions = self.seen + np.arange(1, values.size + 1)
+            keep = self.rng.random(values.size) < self.capacity / positions
+            slots = self.rng.integers(0, self.capacity, keep.sum())
+            self.sample[slots] = values[keep]
+            self.seen += values.size
+
+    def result(self):
+        return float(np.median(self.sample)) if self.sample.size else None
+
+
+class _ModeAccumulator:
+    def __init__(self):
+        self.counts = None
+
+    def update(self, series):
+        counts = series.value_counts()
+        self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0)
+
+    def result(self):
+        if self.counts is None or self.counts.empty:
+            raise ValueError("Cannot calculate mode of an empty column")
+        top = self.counts[self.counts == self.counts.max()].index
+        # Series.mode() returns ties in sorted order; match its first pick
+        try:
+            return sorted(top)[0]
+        except TypeError:
+            return top[0]
+
+
+_ACCUMULATORS = {
+    'fill_mean': _MeanAccumulator,
+    'fill_median': _MedianAccumulator,
+    'fill_mode': _ModeAccumulator
+}
+
+
+def _to_native(value):
+    return value.item() if isinstance(value, np.generic) else value
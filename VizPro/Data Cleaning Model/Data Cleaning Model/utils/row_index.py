@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_analysis import mix64
+
+
+# Salt for values that are neither text, numbers nor missing (booleans, dates, ...)
+_OTHER = mix64(np.uint64(103))
+
+
+def hash_column(series):
+    """64-bit hash of every value in a column; equal values hash alike.
+
+    A value hashes the same whatever column dtype holds it: numbers as
+    floats (so 1 and 1.0 match, as pandas compares them), text as text,
+    and None, NaN and NaT all as NaN. pandas hashes object values through
+    their text, so other values are salted to keep 1 and '1' apart.
+    """
+    values = series.astype(object) if isinstance(series.dtype, pd.CategoricalDtype) else series
+    if values.dtype != object:
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            values = values.astype(np.float64)
+        return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+    values = values.to_numpy()
+    missing = pd.isna(values)
+    is_text = np.fromiter((isinstance(v, str) for v in values), dtype=bool, count=len(values))
+    is_number = missing | np.fromiter(
+        (isinstance(v, (int, float, np.number)) and not isinstance(v, (bool, np.bool_)) for v in values),
+        dtype=bool, count=len(values)
+    )
+    if is_text.all():
+        return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+    hashes = np.empty(len(values), dtype=np.uint64)
+    numbers = np.where(missing[is_number], np.nan, values[is_number]).astype(np.float64)
+    hashes[is_number] = pd.util.hash_pandas_object(pd.Series(numbers), index=False).to_numpy()
+    if is_text.any():
+        hashes[is_text] = pd.util.hash_pandas_object(pd.Series(values[is_text]), index=False).to_numpy()
+    other = ~(is_text | is_number)
+    if other.any():
+        hashed = pd.util.hash_pandas_object(pd.Series(values[other]), index=False).to_numpy()
+        hashes[other] = mix64(hashed ^ _OTHER)
+    return hashes
+
+
+def duplicated_rows(df, hashes, columns=None):
+    """Mask of rows repeating an earlier row, exactly like ``df.duplicated(columns)``.
+
+    Hashes only pick the candidates: rows sharing a hash with another row
+    are compared on their values, so a hash collision never drops a row.
+    """
+    candidates = pd.Series(hashes).duplicated(keep=False).to_numpy()
+    duplicated = np.zeros(len(df), dtype=bool)
+    if candidates.any():
+        duplicated[candidates] = df[candidates].duplicated(subset=columns).to_numpy()
+    return duplicated
+
+
+class RowHashIndex:
+    """A 64-bit hash per row, built from per-column hashes.
+
+    Row hashes are the wrapping sum of mixed, position-salted column hashes,
+    so replacing one column only costs rehashing that column. Rows with
+    equal hashes are only candidate duplicates; duplicated_rows confirms
+    them on the values.
+    """
+
+    def __init__(self, df):
+        self.rebuild(df)
+
+    def rebuild(self, df):
+        self.index = df.index
+        self.columns = list(df.columns)
+        self.column_hashes = [hash_column(df.iloc[:, i]) for i in range(len(self.columns))]
+        self.row_hashes = self._combine(self.column_hashes)
+        self._duplicates = {}
+
+    def update(self, df, changed_columns=None):
+        """Bring the index in line with an edited version of its DataFrame.
+
+        Rows that survive are carried over by index label and only
+        ``changed_columns`` are rehashed, unless the column layout changed
+        or no list is given.
+        """
+        if changed_columns is None or list(df.columns) != self.columns:
+            return self.rebuild(df)
+
+        kept = self._positions(df.index)
+        if kept is None:
+            return self.rebuild(df)
+        if not isinstance(kept, slice):
+            self.column_hashes = [hashes[kept] for hashes in self.column_hashes]
+            self.row_hashes = self.row_hashes[kept]
+        self.index = df.index
+        self._duplicates = {}
+
+        with np.errstate(over='ignore'):
+            for column in changed_columns:
+                position = self.columns.index(column)
+                hashes = hash_column(df.iloc[:, position])
+                self.row_hashes -= self._salted(self.column_hashes[position], position)
+                self.row_hashes += self._salted(hashes, position)
+                self.column_hashes[position] = hashes
+
+    def hashes_for(self, df, columns, fresh=()):
+        """Row hashes of ``df`` over ``columns``.
+
+        ``df`` may hold a subset of the indexed rows; stored column hashes
+        are reused except for the columns named in ``fresh``, which are
+        hashed again from ``df``.
+        """
+        kept = self._positions(df.index)
+        if kept is None:
+            fresh = columns
+        elif (columns == self.columns and not fresh) or not len(df):
+            return self.row_hashes[kept]
+
+        hashes = []
+        for column in columns:
+            if column in fresh or column not in self.columns:
+                hashes.append(hash_column(df[column]))
+            else:
+                hashes.append(self.column_hashes[self.columns.index(column)][kept])
+        return self._combine(hashes)
+
+    def duplicate_count(self, df, columns=None):
+        """Number of rows of ``df`` that repeat an earlier row, like df.duplicated().sum().
+
+        ``df`` is the indexed DataFrame. Counts are kept until the next
+        update, so repeated calls are O(1).
+        """
+        key = tuple(columns) if columns else None
+        if key not in self._duplicates:
+            if key is None:
+                hashes = self.row_hashes
+            else:
+                missing = [c for c in columns if c not in self.columns]
+                if missing:
+                    raise ValueError(f"Columns not found: {missing}")
+                hashes = self._combine([self.column_hashes[self.columns.index(c)] for c in columns])
+            self._duplicates[key] = int(duplicated_rows(df, hashes, columns).sum())
+        return self._duplicates[key]
+
+    def _positions(self, index):
+        """Positions of ``index`` labels in the indexed rows, or None."""
+        if index.equals(self.index):
+            return slice(None)
+        if not self.index.is_unique:
+            return None
+        positions = self.index.get_indexer(index)
+        if (positions < 0).any():
+            return None
+        return positions
+
+    def _combine(self, column_hashes):
+        rows = len(column_hashes[0]) if column_hashes else len(self.index)
+        total = np.zeros(rows, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for position, hashes in enumerate(column_hashes):
+                total += self._salted(hashes, position)
+        return total
+
+    @staticmethod
+    def _salted(hashes, position):
+        # Salting by position keeps rows with values swapped between columns apart
+        return mix64(hashes ^ mix64(np.uint64(position + 1)))
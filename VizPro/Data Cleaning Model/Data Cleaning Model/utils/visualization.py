@@ -6,14 +6,17 @@ from sklearn.cluster import KMeans
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from vizpro_common.plot_json import figure_payload
+from vizpro_common.downsampling import (DEFAULT_MAX_POINTS, decimate_series, sample_points, density_grid,
+                                        scatter_method, reduction_info, annotate_reduction)
+
+# Row buckets of the missing-data matrix, whatever the row count
+MISSING_BUCKETS = 200
 
 def serialize_plot(fig):
     """Helper function to properly serialize Plotly figures."""
     try:
-        return {
-            'data': fig.to_dict()['data'],
-            'layout': fig.to_dict()['layout']
-        }
+        return figure_payload(fig)
     except Exception as e:
         raise Exception(f"Error serializing plot: {str(e)}")
 
@@ -40,10 +43,20 @@ def create_correlation_matrix(df):
     )
     return serialize_plot(fig)
 
-def create_scatter_plot(df, x_col, y_col, color_col=None):
-    """Create scatter plot data."""
-    fig = px.scatter(df, x=x_col, y=y_col, color=color_col,
-                    title=f"Scatter Plot: {x_col} vs {y_col}")
+def create_scatter_plot(df, x_col, y_col, color_col=None, max_points=DEFAULT_MAX_POINTS):
+    """Create scatter plot data, reduced to about ``max_points`` points."""
+    columns = [col for col in dict.fromkeys([x_col, y_col, color_col]) if col is not None]
+    method = scatter_method(df, x_col, y_col, max_points, color_col)
+    if method == 'bin':
+        fig, info = _density_figure(df[x_col], df[y_col], f"Scatter Plot: {x_col} vs {y_col}", x_col, y_col)
+    else:
+        df, info = sample_points(df[columns], max_points, columns)
+        # Plotly trips over categories with no rows, so plot the plain values
+        categorical = [col for col in columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+        if categorical:
+            df = df.assign(**{col: df[col].astype(object) for col in categorical})
+        fig = px.scatter(df, x=x_col, y=y_col, color=color_col,
+                        title=f"Scatter Plot: {x_col} vs {y_col}")
     
     fig.update_layout(
         width=900,
@@ -58,10 +71,25 @@ def create_scatter_plot(df, x_col, y_col, color_col=None):
             'yanchor': 'top'
         }
     )
-    return serialize_plot(fig)
+    annotate_reduction(fig, info)
+    result = serialize_plot(fig)
+    result['downsampling'] = info
+    return result
+
+def _density_figure(x, y, title, x_title, y_title):
+    """2D histogram heatmap standing in for a scatter with too many points."""
+    x_centres, y_centres, z, clipped = density_grid(x, y)
+    fig = go.Figure(go.Heatmap(x=x_centres, y=y_centres, z=z, colorscale='Blues',
+                               colorbar={'title': 'Points'}))
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title)
+    cells = int(np.count_nonzero(~np.isnan(z)))
+    return fig, reduction_info(len(x), cells, 'bin', clipped)
 
-def perform_pca_visualization(df):
-    """Perform PCA and return visualization data."""
+def perform_pca_visualization(df, max_points=DEFAULT_MAX_POINTS):
+    """Perform PCA and return visualization data.
+
+    PCA is fitted on every row; only the plotted points are reduced.
+    """
     numeric_cols = df.select_dtypes(include=[np.number]).columns
     if len(numeric_cols) < 2:
         raise ValueError("Need at least 2 numeric columns for PCA")
@@ -71,12 +99,21 @@ def perform_pca_visualization(df):
     
     pca = PCA(n_components=2)
     components = pca.fit_transform(scaled_data)
+    points = pd.DataFrame(components, columns=['pc1', 'pc2'])
+    method = scatter_method(points, 'pc1', 'pc2', max_points)
+    if method == 'bin':
+        fig, info = _density_figure(points['pc1'], points['pc2'], 'PCA Visualization',
+                                    'First Principal Component', 'Second Principal Component')
+        return _finish_pca(fig, info)
+    points, info = sample_points(points, max_points, ['pc1', 'pc2'])
     
-    fig = px.scatter(x=components[:, 0], y=components[:, 1],
+    fig = px.scatter(x=points['pc1'], y=points['pc2'],
                     labels={'x': 'First Principal Component',
                            'y': 'Second Principal Component'},
                     title='PCA Visualization')
-    
+    return _finish_pca(fig, info)
+
+def _finish_pca(fig, info):
     fig.update_layout(
         width=900,
         height=600,
@@ -89,7 +126,10 @@ def perform_pca_visualization(df):
             'yanchor': 'top'
         }
     )
-    return serialize_plot(fig)
+    annotate_reduction(fig, info)
+    result = serialize_plot(fig)
+    result['downsampling'] = info
+    return result
 
 def detect_anomalies(df, column):
     """Detect and visualize anomalies using IQR method."""
@@ -101,34 +141,72 @@ def detect_anomalies(df, column):
     fig = px.box(df, y=column, title=f"Anomaly Detection for {column}")
     fig.add_scatter(x=df.index[outlier_mask], y=df[column][outlier_mask],
                    mode='markers', name='Outliers', marker=dict(color='red'))
-    return fig
+    return serialize_plot(fig)
 
-def create_time_series(df, time_column, value_column):
-    """Create time series visualization."""
-    fig = px.line(df, x=time_column, y=value_column,
+def create_time_series(df, time_column, value_column, max_points=DEFAULT_MAX_POINTS):
+    """Create time series visualization, reduced with LTTB to ``max_points``."""
+    data, info = decimate_series(df, time_column, value_column, max_points)
+    fig = px.line(data, x=time_column, y=value_column,
                   title=f"Time Series: {value_column} over {time_column}")
-    return fig
+    annotate_reduction(fig, info)
+    result = serialize_plot(fig)
+    result['downsampling'] = info
+    return result
+
+def null_fractions(df, buckets=MISSING_BUCKETS):
+    """Share of missing values per column in consecutive row buckets.
+
+    Returns ``(starts, fractions)``: the first row of each bucket and a
+    ``(buckets, columns)`` array. Bucket sizes differ by at most one row.
+    """
+    rows = len(df)
+    buckets = min(buckets, rows)
+    if buckets == 0:
+        return np.empty(0, dtype=np.int64), np.empty((0, df.shape[1]))
+    edges = np.linspace(0, rows, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    sizes = np.diff(edges)[:, None]
+    fractions = np.empty((buckets, df.shape[1]))
+    # Column by column, so only one row mask is held at a time
+    for i, col in enumerate(df.columns):
+        mask = df[col].isna().to_numpy(dtype=np.uint32)
+        fractions[:, i] = np.add.reduceat(mask, starts) / sizes[:, 0]
+    return starts, fractions
 
-def create_missing_data_matrix(df):
-    """Create missing data visualization."""
-    missing = df.isnull()
-    fig = px.imshow(missing,
-                    labels=dict(color="Missing"),
-                    title="Missing Data Matrix",
-                    aspect='auto')
+def create_missing_data_matrix(df, buckets=MISSING_BUCKETS):
+    """Create missing data visualization from per-bucket null fractions.
+
+    Rows are grouped into at most ``buckets`` consecutive buckets, so the
+    payload depends on the column count only, not on the row count.
+    """
+    starts, fractions = null_fractions(df, buckets)
+    fig = go.Figure(go.Heatmap(
+        z=fractions.round(4),
+        x=[str(col) for col in df.columns],
+        y=starts,
+        zmin=0,
+        zmax=1,
+        colorscale='Viridis',
+        colorbar=dict(title="Missing"),
+        hovertemplate="%{x}<br>Rows from %{y}<br>Missing: %{z:.1%}<extra></extra>"
+    ))
     
     fig.update_layout(
+        yaxis=dict(title="Row", autorange='reversed'),
         width=1000,
         height=600,
         margin=dict(l=40, r=40, t=60, b=40),
         title={
+            'text': "Missing Data Matrix",
             'y':0.95,
             'x':0.5,
             'xanchor': 'center',
             'yanchor': 'top'
         }
     )
-    return serialize_plot(fig)
+    result = serialize_plot(fig)
+    result['downsampling'] = reduction_info(len(df), len(starts), 'bin')
+    return result
 
 def create_cluster_visualization(df, columns, n_clusters=3):
     """Create cluster visualization using K-means."""
@@ -142,7 +220,7 @@ def create_cluster_visualization(df, columns, n_clusters=3):
     else:
         fig = px.scatter(data, x=columns[0], color=clusters,
                         title="Cluster Visualization")
-    return fig
+    return serialize_plot(fig)
 
 def create_distribution_plot(df, column):
     """Create distribution plot for a numeric column."""
@@ -181,7 +259,7 @@ def create_summary_dashboard(df):
         )
 
         # Data types plot
-        dtype_counts = df.dtypes.value_counts()
+        dtype_counts = df.dtypes.astype(str).value_counts()
         fig.add_trace(
             go.Pie(labels=dtype_counts.index.astype(str), 
                   values=dtype_counts.values, name='Data Types'),
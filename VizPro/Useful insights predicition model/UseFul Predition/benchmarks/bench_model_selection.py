@@ -0,0 +1,91 @@
+"""Compare eager and lazy model construction: import time and select_model latency.
+
+Usage:
+    python benchmarks/bench_model_selection.py [--repeat N]
+"""
+import argparse
+import contextlib
+import io
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+from main import InsightPredictionModel, MODEL_REGISTRY
+
+# What main.py imported at the top before models were built lazily
+LEGACY_IMPORTS = [
+    'pandas', 'numpy', 'matplotlib.pyplot', 'seaborn',
+    'sklearn.model_selection', 'sklearn.metrics', 'sklearn.preprocessing',
+    'sklearn.linear_model', 'sklearn.ensemble', 'sklearn.svm',
+    'sklearn.neighbors', 'sklearn.tree', 'xgboost'
+]
+
+
+def available(module_name):
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def import_time(statement, repeat):
+    """Best wall time of ``statement`` in a fresh interpreter."""
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout
+        timings.append(float(output))
+    return min(timings)
+
+
+def legacy_select_model(task_type, model_name):
+    """The previous select_model: build every estimator, then keep one."""
+    models = {name: factory() for name, factory in MODEL_REGISTRY[task_type].items()
+              if name != 'xgboost' or available('xgboost')}
+    return models[model_name]
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    present = [name for name in LEGACY_IMPORTS if available(name.split('.')[0])]
+    missing = sorted(set(LEGACY_IMPORTS) - set(present))
+    if missing:
+        print(f"Not installed, left out of the eager import: {', '.join(missing)}")
+    eager = import_time('; '.join(f'import {name}' for name in present), args.repeat)
+    lazy = import_time('import main', args.repeat)
+    print(f"{'import':<30} {'eager s':>10} {'lazy s':>10} {'speedup':>8}")
+    print(f"{'main':<30} {eager:>10.3f} {lazy:>10.3f} {eager / lazy:>7.1f}x")
+
+    print(f"\n{'select_model':<30} {'eager ms':>10} {'lazy ms':>10} {'speedup':>8}")
+    model = InsightPredictionModel()
+    for task_type, factories in MODEL_REGISTRY.items():
+        model.task_type = task_type
+        for name in factories:
+            if name == 'xgboost' and not available('xgboost'):
+                continue
+            before = best_time(lambda: legacy_select_model(task_type, name), args.repeat)
+            with contextlib.redirect_stdout(io.StringIO()):
+                after = best_time(lambda: model.select_model(name), args.repeat)
+            label = f"{task_type}/{name}"
+            print(f"{label:<30} {before * 1000:>10.3f} {after * 1000:>10.3f} {before / after:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,17 +1,75 @@
+import hashlib
+import importlib
+import time
+from collections import OrderedDict
+from functools import partial
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, confusion_matrix
+from sklearn.metrics import get_scorer
 from sklearn.preprocessing import StandardScaler
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.svm import SVR, SVC
-from sklearn.neighbors import KNeighborsRegressor, KNeighborsClassifier
-from sklearn.tree import DecisionTreeRegressor, DecisionTreeClassifier
-from xgboost import XGBRegressor, XGBClassifier
+
+def _build(module_name, class_name, **params):
+    """Import an estimator's module on first use and instantiate it"""
+    return getattr(importlib.import_module(module_name), class_name)(**params)
+
+# Factories for every selectable model. Nothing is imported or built until a
+# model is chosen, so xgboost and the other backends load only when used
+MODEL_REGISTRY = {
+    'regression': {
+        'linear': partial(_build, 'sklearn.linear_model', 'LinearRegression'),
+        'decision_tree': partial(_build, 'sklearn.tree', 'DecisionTreeRegressor', random_state=42),
+        'random_forest': partial(_build, 'sklearn.ensemble', 'RandomForestRegressor', random_state=42),
+        'svr': partial(_build, 'sklearn.svm', 'SVR'),
+        'knn': partial(_build, 'sklearn.neighbors', 'KNeighborsRegressor'),
+        'xgboost': partial(_build, 'xgboost', 'XGBRegressor', random_state=42)
+    },
+    'classification': {
+        'logistic': partial(_build, 'sklearn.linear_model', 'LogisticRegression', random_state=42),
+        'decision_tree': partial(_build, 'sklearn.tree', 'DecisionTreeClassifier', random_state=42),
+        'random_forest': partial(_build, 'sklearn.ensemble', 'RandomForestClassifier', random_state=42),
+        'svc': partial(_build, 'sklearn.svm', 'SVC', probability=True, random_state=42),
+        'knn': partial(_build, 'sklearn.neighbors', 'KNeighborsClassifier'),
+        'xgboost': partial(_build, 'xgboost', 'XGBClassifier', random_state=42)
+    }
+}
+
+# Training sets larger than this are cross-validated on one holdout split
+# instead of k folds
+LARGE_DATA_ROWS = 50000
+# Cross-validation scores kept, keyed by data fingerprint, model and settings
+CV_CACHE_SIZE = 32
+_cv_cache = OrderedDict()
+
+# How fit time grows with training rows, as an exponent; kernel methods are
+# roughly quadratic, the rest close to linear
+FIT_TIME_SCALING = {'svr': 2.0, 'svc': 2.0}
+
+def _fingerprint(X, y):
+    """Digest identifying a training set, for the cross-validation cache"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(X.shape).encode())
+    digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(pd.util.hash_pandas_object(pd.Series(np.asarray(y)), index=False).values.tobytes())
+    return digest.hexdigest()
+
+def _fit_candidate(name, model, X_train, y_train, X_test):
+    """Fit one candidate in a worker; returns timings and test predictions"""
+    try:
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        predictions = model.predict(X_test)
+        predict_time = time.perf_counter() - start
+    except Exception as e:
+        return name, None, None, None, None, str(e)
+    return name, model, fit_time, predict_time, predictions, None
 
 class InsightPredictionModel:
     def __init__(self):
@@ -24,6 +82,7 @@ class InsightPredictionModel:
         self.predictions = None
         self.task_type = None  # 'regression' or 'classification'
         self.scaler = StandardScaler()
+        self._fingerprint = None
         
     def load_data(self, data, target_column, test_size=0.2, random_state=42):
         """Load and split the data"""
@@ -47,37 +106,122 @@ class InsightPredictionModel:
         # Scale features
         self.X_train = self.scaler.fit_transform(self.X_train)
         self.X_test = self.scaler.transform(self.X_test)
+        self._fingerprint = _fingerprint(self.X_train, self.y_train)
         
         print(f"Data loaded and split: {self.X_train.shape[0]} training samples, {self.X_test.shape[0]} test samples")
         
     def select_model(self, model_name):
         """Select and initialize the model based on task type"""
-        models = {
-            'regression': {
-                'linear': LinearRegression(),
-                'decision_tree': DecisionTreeRegressor(random_state=42),
-                'random_forest': RandomForestRegressor(random_state=42),
-                'svr': SVR(),
-                'knn': KNeighborsRegressor(),
-                'xgboost': XGBRegressor(random_state=42)
-            },
-            'classification': {
-                'logistic': LogisticRegression(random_state=42),
-                'decision_tree': DecisionTreeClassifier(random_state=42),
-                'random_forest': RandomForestClassifier(random_state=42),
-                'svc': SVC(probability=True, random_state=42),
-                'knn': KNeighborsClassifier(),
-                'xgboost': XGBClassifier(random_state=42)
-            }
-        }
+        factories = MODEL_REGISTRY[self.task_type]
         
-        if model_name not in models[self.task_type]:
-            valid_models = list(models[self.task_type].keys())
+        if model_name not in factories:
+            valid_models = list(factories.keys())
             raise ValueError(f"Model '{model_name}' not found for {self.task_type}. Choose from: {valid_models}")
         
-        self.model = models[self.task_type][model_name]
+        self.model = factories[model_name]()
         print(f"Selected model: {model_name} for {self.task_type}")
         
+    def compare_models(self, model_names=None, time_budget=None, n_jobs=-1, select_best=True):
+        """Train every candidate model in parallel and return a leaderboard
+        
+        All candidates share the scaled training matrix from load_data().
+        With ``time_budget`` (seconds per fit), each candidate is first timed
+        on a small sample and skipped if its full fit is projected to take
+        longer, which drops kernel methods such as SVR on large data. The
+        best model becomes ``self.model`` unless ``select_best`` is False.
+        """
+        if self.X_train is None:
+            raise ValueError("No data loaded. Use load_data() first.")
+        
+        factories = MODEL_REGISTRY[self.task_type]
+        if model_names is None:
+            model_names = list(factories.keys())
+        unknown = [name for name in model_names if name not in factories]
+        if unknown:
+            raise ValueError(f"Models {unknown} not found for {self.task_type}. Choose from: {list(factories.keys())}")
+        
+        rows = []
+        models = {}
+        for name in model_names:
+            try:
+                models[name] = factories[name]()
+            except ImportError as e:
+                # An optional backend such as xgboost is not installed
+                print(f"Model {name} unavailable: {e}")
+                rows.append({'model': name, 'status': 'failed', 'error': str(e)})
+        if time_budget is not None:
+            for name in list(models):
+                estimate = self._estimate_fit_time(name, models[name])
+                if estimate > time_budget:
+                    print(f"Skipping {name}: estimated fit time {estimate:.1f}s exceeds budget of {time_budget}s")
+                    rows.append({'model': name, 'status': 'skipped', 'estimated_fit_time': estimate})
+                    del models[name]
+        
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_candidate)(name, model, self.X_train, self.y_train, self.X_test)
+            for name, model in models.items()
+        )
+        
+        fitted = {}
+        for name, model, fit_time, predict_time, predictions, error in results:
+            if error is not None:
+                print(f"Model {name} failed: {error}")
+                rows.append({'model': name, 'status': 'failed', 'error': error})
+                continue
+            fitted[name] = (model, predictions)
+            rows.append({
+                'model': name,
+                'status': 'ok',
+                **self._holdout_metrics(predictions),
+                'fit_time': fit_time,
+                'predict_latency_ms': 1000 * predict_time / len(self.X_test)
+            })
+        
+        score = 'r2' if self.task_type == 'regression' else 'accuracy'
+        leaderboard = pd.DataFrame(rows)
+        if score in leaderboard:
+            leaderboard = leaderboard.sort_values(score, ascending=False, na_position='last')
+        leaderboard = leaderboard.reset_index(drop=True)
+        print(leaderboard.to_string())
+        
+        if select_best and fitted:
+            best = leaderboard.loc[leaderboard['status'] == 'ok', 'model'].iloc[0]
+            self.model, self.predictions = fitted[best]
+            print(f"Selected model: {best} for {self.task_type}")
+        
+        return leaderboard
+        
+    def _estimate_fit_time(self, name, model, sample_size=500):
+        """Project a full fit's duration from a fit on a random sample"""
+        n_rows = self.X_train.shape[0]
+        if n_rows <= sample_size:
+            sample_size = n_rows
+        rows = np.random.RandomState(42).choice(n_rows, sample_size, replace=False)
+        y_sample = np.asarray(self.y_train)[rows]
+        
+        start = time.perf_counter()
+        try:
+            clone(model).fit(self.X_train[rows], y_sample)
+        except Exception:
+            # Let the real fit report the failure
+            return 0.0
+        elapsed = time.perf_counter() - start
+        return elapsed * (n_rows / sample_size) ** FIT_TIME_SCALING.get(name, 1.0)
+        
+    def _holdout_metrics(self, predictions):
+        """Test-set metrics for the leaderboard"""
+        if self.task_type == 'regression':
+            mse = mean_squared_error(self.y_test, predictions)
+            return {
+                'r2': r2_score(self.y_test, predictions),
+                'rmse': np.sqrt(mse),
+                'mae': mean_absolute_error(self.y_test, predictions)
+            }
+        return {
+            'accuracy': accuracy_score(self.y_test, predictions),
+            'weighted_f1': f1_score(self.y_test, predictions, average='weighted')
+        }
+        
     def train_model(self):
         """Train the selected model"""
         if self.model is None:
@@ -86,8 +230,15 @@ class InsightPredictionModel:
         self.model.fit(self.X_train, self.y_train)
         print("Model training completed")
         
-    def evaluate_model(self):
-        """Evaluate the model and return metrics"""
+    def evaluate_model(self, cv=5, n_jobs=-1, large_data_rows=LARGE_DATA_ROWS):
+        """Evaluate the model and return metrics
+        
+        ``cv`` is the number of cross-validation folds, run in parallel over
+        ``n_jobs`` cores; 'holdout' scores a single validation split instead
+        and None skips cross-validation. k-fold falls back to a holdout on
+        training sets above ``large_data_rows``. Scores are cached, so
+        evaluating the same model on the same data again costs no refits.
+        """
         if self.model is None:
             raise ValueError("No model trained. Use train_model() first.")
         
@@ -105,9 +256,10 @@ class InsightPredictionModel:
             print(f"R² Score: {r2:.4f}")
             
             # Cross-validation
-            cv_scores = cross_val_score(self.model, self.X_train, self.y_train, cv=5, scoring='r2')
-            print(f"Cross-Validation R² Scores: {cv_scores}")
-            print(f"Mean CV R² Score: {np.mean(cv_scores):.4f}")
+            cv_scores = self._cross_validate('r2', cv, n_jobs, large_data_rows)
+            if cv_scores is not None:
+                print(f"Cross-Validation R² Scores: {cv_scores}")
+                print(f"Mean CV R² Score: {np.mean(cv_scores):.4f}")
             
             return {
                 'mse': mse,
@@ -115,7 +267,7 @@ class InsightPredictionModel:
                 'mae': mae,
                 'r2': r2,
                 'cv_scores': cv_scores,
-                'cv_mean': np.mean(cv_scores)
+                'cv_mean': np.mean(cv_scores) if cv_scores is not None else None
             }
             
         else:  # classification
@@ -155,17 +307,51 @@ class InsightPredictionModel:
                 }
             
             # Cross-validation
-            cv_scores = cross_val_score(self.model, self.X_train, self.y_train, cv=5, scoring='accuracy')
-            print(f"Cross-Validation Accuracy Scores: {cv_scores}")
-            print(f"Mean CV Accuracy Score: {np.mean(cv_scores):.4f}")
+            cv_scores = self._cross_validate('accuracy', cv, n_jobs, large_data_rows)
+            if cv_scores is not None:
+                print(f"Cross-Validation Accuracy Scores: {cv_scores}")
+                print(f"Mean CV Accuracy Score: {np.mean(cv_scores):.4f}")
             
             metrics['cv_scores'] = cv_scores
-            metrics['cv_mean'] = np.mean(cv_scores)
+            metrics['cv_mean'] = np.mean(cv_scores) if cv_scores is not None else None
             
             return metrics
     
+    def _cross_validate(self, scoring, cv, n_jobs, large_data_rows):
+        """Cross-validation scores of the current model, reusing cached results"""
+        if cv is None:
+            return None
+        if cv != 'holdout' and self.X_train.shape[0] > large_data_rows:
+            print(f"Training set above {large_data_rows} rows: using a holdout split instead of {cv}-fold CV")
+            cv = 'holdout'
+        
+        params = sorted(self.model.get_params(deep=True).items())
+        key = (self._fingerprint, type(self.model).__name__, repr(params), cv, scoring)
+        if key in _cv_cache:
+            _cv_cache.move_to_end(key)
+            return _cv_cache[key]
+        
+        if cv == 'holdout':
+            X_fit, X_val, y_fit, y_val = train_test_split(
+                self.X_train, self.y_train, test_size=0.2, random_state=42
+            )
+            model = clone(self.model).fit(X_fit, y_fit)
+            scores = np.array([get_scorer(scoring)(model, X_val, y_val)])
+        else:
+            scores = cross_val_score(self.model, self.X_train, self.y_train, cv=cv,
+                                     scoring=scoring, n_jobs=n_jobs)
+        
+        _cv_cache[key] = scores
+        while len(_cv_cache) > CV_CACHE_SIZE:
+            _cv_cache.popitem(last=False)
+        return scores
+    
     def visualize_results(self):
         """Create visualizations based on model results"""
+        # Plotting libraries are only needed here, so they load on first use
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
         plt.figure(figsize=(15, 10))
         
         if self.task_type == 'regression':
@@ -1,39 +1,99 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, session, Response
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-import plotly.express as px
-import plotly.utils
 import json
 import os
-import pickle
+import tempfile
+import time
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 from werkzeug.utils import secure_filename
+from utils.registry import DatasetRegistry
+from utils.jobs import JobManager
+from utils.training import MODEL_TYPES, run_training_job, predict
+from utils.scoring import score_csv, DEFAULT_CHUNKSIZE
+from utils.charts import dashboard_charts, render_chart, render_cached_chart, init_worker
+# Shared with the Data Cleaning app; the utils imports above put them on the path
+from vizpro_common.paging import parse_window_args, get_row_window
+from vizpro_common.ingestion import read_table, reader_settings, memory_report, widen_floats
+from vizpro_common.dataset_cache import DatasetCache
+from vizpro_common.figure_cache import FigureCache
+from vizpro_common.downsampling import parse_max_points
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MODELS_FOLDER'] = 'models'
+app.config['CACHE_FOLDER'] = 'cache'
+app.config['SESSIONS_FOLDER'] = 'sessions'
+app.config['SCORES_FOLDER'] = 'scores'
+app.config['JOBS_FOLDER'] = 'jobs'
+# Training jobs running at once per server process; the rest wait in a queue
+app.config['TRAINING_WORKERS'] = int(os.environ.get('TRAINING_WORKERS', 2))
+# zlib level for saved models; 0 keeps them uncompressed and memory-mappable
+app.config['MODEL_COMPRESSION'] = int(os.environ.get('MODEL_COMPRESSION', 0))
+# Processes scoring the chunks of one /predict_file request
+app.config['SCORING_WORKERS'] = int(os.environ.get('SCORING_WORKERS', 1))
+# Processes building /visualize charts, shared by all requests of a server
+# process; 1 builds them one by one in the server process itself
+app.config['VISUALIZE_WORKERS'] = int(os.environ.get('VISUALIZE_WORKERS', min(4, os.cpu_count() or 1)))
+# Memory for built figures; set FIGURE_CACHE_FOLDER to spill evicted ones to disk
+app.config['FIGURE_CACHE_BYTES'] = int(os.environ.get('FIGURE_CACHE_BYTES', 64 * 1024 * 1024))
+app.config['FIGURE_CACHE_FOLDER'] = os.environ.get('FIGURE_CACHE_FOLDER')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Every worker must share SECRET_KEY for session cookies to work across them
+app.secret_key = os.environ.get('SECRET_KEY') or os.urandom(24)
 
 # Create necessary folders if they don't exist
-for folder in [app.config['UPLOAD_FOLDER'], app.config['MODELS_FOLDER']]:
+for folder in [app.config['UPLOAD_FOLDER'], app.config['MODELS_FOLDER'], app.config['CACHE_FOLDER'],
+               app.config['SESSIONS_FOLDER'], app.config['JOBS_FOLDER'], app.config['SCORES_FOLDER']]:
     if not os.path.exists(folder):
         os.makedirs(folder)
 
-# Global variables to store data
-current_data = None
-trained_model = None
-model_filename = None
+# Parsed uploads keyed by file content; identical uploads skip parsing
+dataset_cache = DatasetCache(app.config['CACHE_FOLDER'])
+
+# Uploaded datasets and trained models per session. Handles live on disk,
+# so any worker sharing these folders can serve any session
+registry = DatasetRegistry(app.config['SESSIONS_FOLDER'], dataset_cache, app.config['MODELS_FOLDER'])
+
+# Figures by dataset content and chart spec, so repeat dashboard loads skip rebuilding
+figures = FigureCache(app.config['FIGURE_CACHE_BYTES'], app.config['FIGURE_CACHE_FOLDER'])
+
+# Dashboard charts are independent, so they are built side by side: these
+# threads look charts up in the figure cache and hand misses to the chart
+# processes. Both pools are shared, bounding the work of concurrent requests
+chart_pool = ThreadPoolExecutor(max_workers=app.config['VISUALIZE_WORKERS'], thread_name_prefix='charts')
+_chart_processes = None
+_chart_processes_lock = threading.Lock()
+_render_lock = threading.Lock()
+STREAM_MIMETYPES = {'ndjson': 'application/x-ndjson', 'sse': 'text/event-stream'}
+
+# Background training, so requests return at once and training can be cancelled
+jobs = JobManager(app.config['JOBS_FOLDER'], max_workers=app.config['TRAINING_WORKERS'])
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def get_dataset_id():
+    """Handle named by the request, or the last upload of this session."""
+    data = request.get_json(silent=True) or {}
+    return request.args.get('dataset_id') or data.get('dataset_id') or session.get('dataset_id')
+
+def load_current_data():
+    """Return ``(dataset_id, DataFrame)``; the DataFrame is None if unavailable."""
+    dataset_id = get_dataset_id()
+    if not dataset_id:
+        return None, None
+    try:
+        return dataset_id, registry.get_data(dataset_id)
+    except KeyError:
+        return dataset_id, None
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
-    global current_data
     if 'file' not in request.files:
         return jsonify({'error': 'No file part'})
     
@@ -43,43 +103,83 @@ def upload_file():
     
     if file and file.filename.endswith('.csv'):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Read and analyze the data
-        current_data = pd.read_csv(filepath)
+        current_data, cache_key, cache_hit = dataset_cache.load(file, filename, read_upload,
+                                                                   reader_settings(parse_dates=False))
+        if current_data is None:
+            return jsonify({'error': 'Invalid file format'})
+        dataset_id = registry.create(current_data, cache_key, filename)
+        session['dataset_id'] = dataset_id
         
         # Generate basic statistics
         stats = {
+            'dataset_id': dataset_id,
             'rows': len(current_data),
             'columns': len(current_data.columns),
             'column_names': current_data.columns.tolist(),
             'dtypes': current_data.dtypes.astype(str).to_dict(),
             'missing_values': current_data.isnull().sum().to_dict(),
-            'numeric_columns': current_data.select_dtypes(include=[np.number]).columns.tolist()
+            'numeric_columns': current_data.select_dtypes(include=[np.number]).columns.tolist(),
+            'memory': memory_report(current_data),
+            'cache': {'key': cache_key, 'hit': cache_hit}
         }
         
         return jsonify(stats)
     
     return jsonify({'error': 'Invalid file format'})
 
+def read_upload(file, filename):
+    """Parse an upload straight from the request stream.
+
+    These are the bytes the dataset cache hashed; a shared file on disk
+    could be overwritten by a concurrent upload with the same name.
+    """
+    # Dates stay categorical so training still one-hot encodes them as before
+    return read_table(file, filename, parse_dates=False)
+
 @app.route('/preview', methods=['GET'])
 def preview_data():
+    _, current_data = load_current_data()
     if current_data is None:
         return jsonify({'error': 'No data uploaded'})
     
-    preview = current_data.head(5).to_dict(orient='records')
+    preview = widen_floats(current_data.head(5)).to_dict(orient='records')
     return jsonify(preview)
 
+@app.route('/rows', methods=['GET'])
+def get_rows():
+    """Return one window of the uploaded data for scrolling previews."""
+    dataset_id, current_data = load_current_data()
+    if current_data is None:
+        return jsonify({'error': 'No data uploaded'})
+
+    try:
+        offset, limit, columns, sort = parse_window_args(request.args)
+        window = get_row_window(current_data, offset, limit, columns, sort,
+                                registry.row_orders(dataset_id))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # NaN is not valid JSON, send null instead
+    window = widen_floats(window)
+    window = window.astype(object).where(window.notna(), None)
+    return jsonify({
+        'offset': offset,
+        'limit': limit,
+        'total_rows': len(current_data),
+        'columns': window.columns.tolist(),
+        'rows': window.to_dict(orient='records')
+    })
+
 @app.route('/analyze', methods=['GET'])
 def analyze_data():
+    _, current_data = load_current_data()
     if current_data is None:
         return jsonify({'error': 'No data uploaded'})
     
     # Enhanced data analysis
     analysis = {
         'numerical_columns': current_data.select_dtypes(include=[np.number]).columns.tolist(),
-        'categorical_columns': current_data.select_dtypes(include=['object']).columns.tolist(),
+        'categorical_columns': current_data.select_dtypes(include=['object', 'category']).columns.tolist(),
         'missing_values': current_data.isnull().sum().to_dict(),
         'summary_stats': current_data.describe().to_dict(),
         'correlation_matrix': current_data.select_dtypes(include=[np.number]).corr().to_dict(),
@@ -90,8 +190,6 @@ def analyze_data():
 
 @app.route('/train', methods=['POST'])
 def train_model():
-    global trained_model, model_filename, current_data
-    
     try:
         # Get user inputs
         data = request.json
@@ -105,127 +203,169 @@ def train_model():
         if not target_column or not model_type:
             return jsonify({'error': 'Please select target column and model type'}), 400
             
+        if model_type not in MODEL_TYPES:
+            return jsonify({'error': f'Invalid model type: {model_type}'}), 400
+            
+        dataset_id, current_data = load_current_data()
         if current_data is None:
             return jsonify({'error': 'Please upload data first'}), 400
             
         if target_column not in current_data.columns:
             return jsonify({'error': f'Target column "{target_column}" not found in dataset'}), 400
         
-        # Prepare data
-        X = current_data.drop(columns=[target_column])
-        y = current_data[target_column]
-        
-        # Handle categorical variables
-        X = pd.get_dummies(X)
-        
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Calculate split sizes
-        split_info = {
-            'train_size': len(X_train),
-            'test_size': len(X_test),
-            'train_percentage': 80,
-            'test_percentage': 20
-        }
+        # Training runs in a worker process; the client polls /jobs/<job_id>
+        job = jobs.submit(run_training_job, job_directories(), dataset_id, target_column, model_type,
+                          app.config['MODEL_COMPRESSION'], kind='train', dataset_id=dataset_id)
+        job['status_url'] = f"/jobs/{job['job_id']}"
+        return jsonify(job), 202
         
-        # Train model
-        if model_type == 'linear_regression':
-            model = LinearRegression()
-        elif model_type == 'logistic_regression':
-            model = LogisticRegression(multi_class='multinomial', max_iter=1000)
-        elif model_type == 'random_forest_classifier':
-            model = RandomForestClassifier(n_estimators=100, random_state=42)
-        elif model_type == 'random_forest_regressor':
-            model = RandomForestRegressor(n_estimators=100, random_state=42)
-        else:
-            return jsonify({'error': f'Invalid model type: {model_type}'}), 400
-        
-        # Train the model
-        model.fit(X_train, y_train)
-        trained_model = model
-        
-        # Calculate predictions
-        y_train_pred = model.predict(X_train)
-        y_test_pred = model.predict(X_test)
+    except Exception as e:
+        print(f"Error in train_model: {str(e)}")
+        return jsonify({
+            'error': f'Error training model: {str(e)}',
+            'status': 'error'
+        }), 500
+
+def job_directories():
+    """Absolute folders for job workers, whose working directory may differ."""
+    return {
+        'cache': os.path.abspath(app.config['CACHE_FOLDER']),
+        'sessions': os.path.abspath(app.config['SESSIONS_FOLDER']),
+        'models': os.path.abspath(app.config['MODELS_FOLDER'])
+    }
+
+@app.route('/jobs/<job_id>', methods=['GET', 'DELETE'])
+def job_status(job_id):
+    """Status, progress and result of a background job; DELETE cancels it."""
+    try:
+        if request.method == 'DELETE':
+            return jsonify(jobs.cancel(job_id))
+        return jsonify(jobs.status(job_id))
+    except KeyError:
+        return jsonify({'error': f'Job "{job_id}" not found'}), 404
+
+@app.route('/predict', methods=['POST'])
+def predict_rows():
+    """Score JSON rows with a saved model.
+
+    Uses ``model_filename`` if given, else the latest model of the dataset.
+    Loaded models stay cached in this process; ``timing`` tells a cold
+    load from disk apart from a warm cache hit.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        rows = data.get('rows')
+        if not isinstance(rows, list) or not rows:
+            return jsonify({'error': 'Please provide a non-empty list of rows'}), 400
         
-        # Calculate performance metrics
-        train_score = float(model.score(X_train, y_train))
-        test_score = float(model.score(X_test, y_test))
+        model_filename, error = resolve_model_filename(data.get('model_filename'))
+        if error:
+            return jsonify({'error': error[0]}), error[1]
         
-        metrics = {
-            'train_score': train_score,
-            'test_score': test_score,
-            'split_info': split_info
-        }
+        start = time.perf_counter()
+        bundle, warm = registry.fetch_model(model_filename)
+        loaded = time.perf_counter()
+        predictions = predict(bundle, pd.DataFrame(rows))
+        done = time.perf_counter()
         
-        # Add specific metrics based on model type
-        if model_type in ['linear_regression', 'random_forest_regressor']:
-            from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-            metrics.update({
-                'train_mse': float(mean_squared_error(y_train, y_train_pred)),
-                'test_mse': float(mean_squared_error(y_test, y_test_pred)),
-                'train_mae': float(mean_absolute_error(y_train, y_train_pred)),
-                'test_mae': float(mean_absolute_error(y_test, y_test_pred)),
-                'train_r2': float(r2_score(y_train, y_train_pred)),
-                'test_r2': float(r2_score(y_test, y_test_pred))
-            })
-        else:  # Classification metrics
-            from sklearn.metrics import precision_score, recall_score, f1_score
-            try:
-                metrics.update({
-                    'train_precision': float(precision_score(y_train, y_train_pred, average='weighted')),
-                    'test_precision': float(precision_score(y_test, y_test_pred, average='weighted')),
-                    'train_recall': float(recall_score(y_train, y_train_pred, average='weighted')),
-                    'test_recall': float(recall_score(y_test, y_test_pred, average='weighted')),
-                    'train_f1': float(f1_score(y_train, y_train_pred, average='weighted')),
-                    'test_f1': float(f1_score(y_test, y_test_pred, average='weighted'))
-                })
-            except Exception as e:
-                print(f"Warning: Could not calculate classification metrics: {str(e)}")
-                metrics.update({
-                    'train_accuracy': train_score,
-                    'test_accuracy': test_score
-                })
+        return jsonify({
+            'model_filename': model_filename,
+            'target_column': bundle['target_column'],
+            'predictions': predictions.tolist(),
+            'timing': {
+                'model_cache': 'warm' if warm else 'cold',
+                'load_ms': round((loaded - start) * 1000, 3),
+                'predict_ms': round((done - loaded) * 1000, 3)
+            },
+            'model_cache_stats': registry.model_cache_stats()
+        })
         
-        # Get feature importance
-        feature_importance = None
-        if hasattr(model, 'feature_importances_'):
-            feature_importance = dict(zip(X.columns, model.feature_importances_.tolist()))
-        elif hasattr(model, 'coef_'):
-            if len(model.coef_.shape) == 1:
-                feature_importance = dict(zip(X.columns, abs(model.coef_).tolist()))
-            else:
-                feature_importance = dict(zip(X.columns, abs(model.coef_).mean(axis=0).tolist()))
+    except Exception as e:
+        print(f"Error in predict_rows: {str(e)}")
+        return jsonify({
+            'error': f'Error making predictions: {str(e)}',
+            'status': 'error'
+        }), 500
+
+def resolve_model_filename(model_filename=None):
+    """Return ``(model_filename, None)``, or ``(None, (message, status))``.
+
+    Without an explicit file name the latest model of the dataset is used.
+    """
+    if not model_filename:
+        dataset_id = get_dataset_id()
+        try:
+            model_filename = registry.handle(dataset_id)['model_filename'] if dataset_id else None
+        except KeyError:
+            model_filename = None
+        if not model_filename:
+            return None, ('Please train a model first', 400)
+    if (secure_filename(model_filename) != model_filename
+            or not os.path.exists(os.path.join(app.config['MODELS_FOLDER'], model_filename))):
+        return None, ('Model not found', 404)
+    return model_filename, None
+
+@app.route('/predict_file', methods=['POST'])
+def predict_file():
+    """Score an uploaded CSV chunk by chunk into a downloadable CSV."""
+    try:
+        if 'file' not in request.files or not request.files['file'].filename:
+            return jsonify({'error': 'No file uploaded'}), 400
+        file = request.files['file']
+        filename = secure_filename(file.filename)
+        if not filename.endswith('.csv'):
+            return jsonify({'error': 'Only CSV files can be scored'}), 400
         
-        # Save the model
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        model_filename = f'model_{model_type}_{timestamp}.pkl'
-        model_path = os.path.join(app.config['MODELS_FOLDER'], model_filename)
+        model_filename, error = resolve_model_filename(request.form.get('model_filename'))
+        if error:
+            return jsonify({'error': error[0]}), error[1]
+        try:
+            chunksize = int(request.form.get('chunksize', DEFAULT_CHUNKSIZE))
+        except ValueError:
+            return jsonify({'error': 'chunksize must be an integer'}), 400
+        if chunksize <= 0:
+            return jsonify({'error': 'chunksize must be positive'}), 400
         
-        with open(model_path, 'wb') as f:
-            pickle.dump({
-                'model': model,
-                'feature_names': X.columns.tolist(),
-                'target_column': target_column,
-                'model_type': model_type,
-                'split_info': split_info
-            }, f)
+        # A name of its own, so concurrent uploads of the same file never collide
+        fd, input_path = tempfile.mkstemp(dir=app.config['UPLOAD_FOLDER'], suffix='.csv')
+        os.close(fd)
+        stem = os.path.splitext(filename)[0]
+        output_filename = f"{stem}_scored_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.csv"
+        output_path = os.path.join(app.config['SCORES_FOLDER'], output_filename)
         
-        return jsonify({
-            'model_type': model_type,
-            'metrics': metrics,
-            'feature_importance': feature_importance,
-            'model_filename': model_filename
+        try:
+            file.save(input_path)
+            stats = score_csv(
+                input_path, output_path,
+                bundle=registry.load_model(model_filename),
+                model_path=os.path.abspath(os.path.join(app.config['MODELS_FOLDER'], model_filename)),
+                chunksize=chunksize,
+                workers=app.config['SCORING_WORKERS']
+            )
+        finally:
+            os.remove(input_path)
+        stats.update({
+            'model_filename': model_filename,
+            'output_filename': output_filename,
+            'download_url': f'/download_scores/{output_filename}'
         })
+        return jsonify(stats)
         
     except Exception as e:
-        print(f"Error in train_model: {str(e)}")
+        print(f"Error in predict_file: {str(e)}")
         return jsonify({
-            'error': f'Error training model: {str(e)}',
+            'error': f'Error scoring file: {str(e)}',
             'status': 'error'
         }), 500
 
+@app.route('/download_scores/<filename>')
+def download_scores(filename):
+    path = os.path.join(app.config['SCORES_FOLDER'], secure_filename(filename))
+    if not filename or not os.path.exists(path):
+        return jsonify({'error': 'Scored file not found'}), 404
+    
+    return send_file(path, as_attachment=True, download_name=filename)
+
 @app.route('/download_model/<filename>')
 def download_model(filename):
     if not filename or not os.path.exists(os.path.join(app.config['MODELS_FOLDER'], filename)):
@@ -237,113 +377,62 @@ def download_model(filename):
         download_name=filename
     )
 
+@app.route('/figure_cache', methods=['GET'])
+def figure_cache_stats():
+    """Hit and miss counters of this process' figure cache."""
+    return jsonify(figures.stats())
+
 @app.route('/visualize', methods=['GET'])
 def visualize_data():
+    """Build the dashboard's charts on the chart pool.
+
+    ``?stream=ndjson`` (or ``sse``) sends each chart as soon as it is
+    ready instead of one JSON document at the end.
+    """
     try:
+        dataset_id, current_data = load_current_data()
         if current_data is None:
             return jsonify({'error': 'No data uploaded'})
         
-        # Initialize empty visualizations dictionary
-        visualizations = {
-            'distribution_plots': [],
-            'correlation_matrix': None,
-            'scatter_plots': [],
-            'insights': []
-        }
-        
         # Get numerical columns safely
         numerical_cols = current_data.select_dtypes(include=[np.number]).columns.tolist()
         if not numerical_cols:
             return jsonify({'error': 'No numerical columns found in the dataset'})
         
-        # Create distribution plots
-        for col in numerical_cols:
-            try:
-                # Handle NaN values
-                clean_data = current_data[col].dropna()
-                if len(clean_data) == 0:
-                    continue
-                    
-                fig = px.histogram(
-                    clean_data, 
-                    title=f'Distribution of {col}',
-                    template='plotly_dark',
-                    color_discrete_sequence=['#4facfe']
-                )
-                fig.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0.05)',
-                    font={'color': '#ffffff'}
-                )
-                visualizations['distribution_plots'].append({
-                    'name': col,
-                    'plot': json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
-                })
-            except Exception as e:
-                print(f"Error creating distribution plot for {col}: {str(e)}")
-                continue
+        # Scatter plots send at most this many points each
+        try:
+            max_points = parse_max_points(request.args.get('max_points'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        stream = request.args.get('stream')
+        if stream not in (None, '', 'ndjson', 'sse'):
+            return jsonify({'error': "stream must be 'ndjson' or 'sse'"}), 400
         
-        # Create correlation matrix if we have multiple numerical columns
-        if len(numerical_cols) > 1:
-            try:
-                # Handle NaN values in correlation matrix
-                corr_matrix = current_data[numerical_cols].fillna(0).corr()
-                fig = px.imshow(
-                    corr_matrix,
-                    title='Correlation Matrix',
-                    template='plotly_dark',
-                    color_continuous_scale=['#00f2fe', '#ffffff', '#4facfe']
-                )
-                fig.update_layout(
-                    paper_bgcolor='rgba(0,0,0,0)',
-                    plot_bgcolor='rgba(0,0,0,0.05)',
-                    font={'color': '#ffffff'}
-                )
-                visualizations['correlation_matrix'] = json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
-                
-                # Generate correlation insights
-                np.fill_diagonal(corr_matrix.values, 0)
-                strongest_corr = np.abs(corr_matrix).unstack().sort_values(ascending=False)[:5]
-                for (col1, col2), corr_value in strongest_corr.items():
-                    if col1 != col2:
-                        visualizations['insights'].append({
-                            'type': 'correlation',
-                            'message': f'Strong {("positive" if corr_value > 0 else "negative")} correlation ({corr_value:.2f}) between {col1} and {col2}'
-                        })
-            except Exception as e:
-                print(f"Error creating correlation matrix: {str(e)}")
+        # Figures are cached by the dataset's content hash and chart spec
+        fingerprint = registry.handle(dataset_id)['cache_key']
+        specs = dashboard_charts(numerical_cols, max_points)
+        start = time.perf_counter()
+        futures = [chart_pool.submit(build_chart, fingerprint, current_data, spec) for spec in specs]
+        
+        if stream:
+            return Response(stream_charts(specs, futures, stream, start),
+                            mimetype=STREAM_MIMETYPES[stream],
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
         
-        # Create scatter plots for feature relationships
-        if len(numerical_cols) > 1:
-            for i, col1 in enumerate(numerical_cols[:-1]):
-                try:
-                    col2 = numerical_cols[i + 1]
-                    # Handle NaN values
-                    clean_data = current_data[[col1, col2]].dropna()
-                    if len(clean_data) == 0:
-                        continue
-                        
-                    fig = px.scatter(
-                        clean_data,
-                        x=col1,
-                        y=col2,
-                        title=f'{col1} vs {col2}',
-                        template='plotly_dark',
-                        color_discrete_sequence=['#4facfe']
-                    )
-                    fig.update_layout(
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        plot_bgcolor='rgba(0,0,0,0.05)',
-                        font={'color': '#ffffff'}
-                    )
-                    visualizations['scatter_plots'].append({
-                        'name': f'{col1} vs {col2}',
-                        'plot': json.loads(json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder))
-                    })
-                except Exception as e:
-                    print(f"Error creating scatter plot for {col1} vs {col2}: {str(e)}")
-                    continue
+        # Initialize empty visualizations dictionary
+        visualizations = {
+            'distribution_plots': [],
+            'correlation_matrix': None,
+            'scatter_plots': [],
+            'insights': []
+        }
+        timings = []
+        for spec, future in zip(specs, futures):
+            chart, timing = future.result()
+            timings.append(timing)
+            add_chart(visualizations, spec['section'], chart)
         
+        visualizations.update(dashboard_stats(timings, start))
         return jsonify(visualizations)
         
     except Exception as e:
@@ -353,5 +442,99 @@ def visualize_data():
             'status': 'error'
         })
 
+def build_chart(fingerprint, df, spec):
+    """Runs on the chart pool: return ``(chart, timing)`` for one chart spec.
+
+    Figure cache misses are built in a chart process; ``fingerprint`` is
+    the dataset's key in the dataset cache, where those processes read it.
+    If the entry was evicted, the chart is built here from ``df`` instead.
+    """
+    start = time.perf_counter()
+    chart, hit, error = None, False, None
+    
+    def build():
+        if app.config['VISUALIZE_WORKERS'] > 1:
+            try:
+                return chart_processes().submit(render_cached_chart, fingerprint, spec['kind'],
+                                                spec['params']).result()
+            except KeyError:
+                # The dataset left the dataset cache; build from our own copy
+                pass
+        # Plotly's figure classes are not safe to build from several threads
+        with _render_lock:
+            return render_chart(df, spec['kind'], spec['params'])
+    
+    try:
+        chart, hit = figures.get_or_create(fingerprint, spec['kind'], spec['params'], build)
+    except Exception as e:
+        error = str(e)
+        print(f"Error creating {spec['kind']} chart {spec['name']}: {error}")
+    timing = {
+        'section': spec['section'],
+        'name': spec['name'],
+        'cached': hit,
+        'ms': round((time.perf_counter() - start) * 1000, 1)
+    }
+    if error:
+        timing['error'] = error
+    return chart, timing
+
+def chart_processes():
+    """Process pool building figures, started on first use."""
+    global _chart_processes
+    with _chart_processes_lock:
+        if _chart_processes is None:
+            # Building a figure is pure Python and holds the GIL, so charts
+            # only run side by side in separate processes. Spawned workers
+            # do not inherit the server's threads and locks
+            _chart_processes = ProcessPoolExecutor(
+                max_workers=app.config['VISUALIZE_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(os.path.abspath(app.config['CACHE_FOLDER']),)
+            )
+        return _chart_processes
+
+def add_chart(visualizations, section, chart):
+    if chart is None:
+        return
+    if section == 'correlation_matrix':
+        visualizations['correlation_matrix'] = chart['plot']
+        visualizations['insights'].extend(chart['insights'])
+    else:
+        visualizations[section].append(chart)
+
+def dashboard_stats(timings, start):
+    hits = sum(timing['cached'] for timing in timings)
+    return {
+        'timings': timings,
+        'total_ms': round((time.perf_counter() - start) * 1000, 1),
+        'figure_cache': {'hits': hits, 'misses': len(timings) - hits}
+    }
+
+def stream_charts(specs, futures, stream, start):
+    """Yield a plan of the charts, then each chart as it completes, then the totals."""
+    def event(name, payload):
+        if stream == 'sse':
+            return f"event: {name}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({'event': name, **payload}) + '\n'
+    
+    yield event('plan', {'charts': [
+        {'index': index, 'section': spec['section'], 'name': spec['name']}
+        for index, spec in enumerate(specs)
+    ]})
+    positions = {future: index for index, future in enumerate(futures)}
+    timings = [None] * len(futures)
+    insights = []
+    for future in as_completed(futures):
+        index = positions[future]
+        chart, timing = future.result()
+        timings[index] = timing
+        if chart is not None and specs[index]['section'] == 'correlation_matrix':
+            insights = chart['insights']
+        yield event('chart', {'index': index, 'section': specs[index]['section'],
+                              'chart': chart, 'timing': timing})
+    yield event('done', {'insights': insights, **dashboard_stats(timings, start)})
+
 if __name__ == '__main__':
     app.run(debug=True)
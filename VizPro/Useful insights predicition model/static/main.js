@@ -1,3 +1,10 @@
+// Handle of the uploaded dataset, sent with every request
+let currentDatasetId = null;
+
+function withDataset(url) {
+    return currentDatasetId ? `${url}?dataset_id=${encodeURIComponent(currentDatasetId)}` : url;
+}
+
 document.addEventListener('DOMContentLoaded', function() {
     const uploadForm = document.getElementById('uploadForm');
     const modelForm = document.getElementById('modelForm');
@@ -85,6 +92,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 showToast(data.error, 'error');
                 return;
             }
+
+            currentDatasetId = data.dataset_id;
             
             // Show data statistics
             const statsHtml = `
@@ -156,144 +165,213 @@ document.addEventListener('DOMContentLoaded', function() {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
+                dataset_id: currentDatasetId,
                 target_column: targetColumn,
                 model_type: modelType
             })
         })
         .then(response => response.json())
-        .then(data => {
-            if (data.error) {
-                showToast(data.error, 'error');
+        .then(job => {
+            if (job.error) {
+                showToast(job.error, 'error');
                 return;
             }
+            showTrainingProgress(job);
+            pollTrainingJob(job.job_id);
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showToast('Error training model', 'error');
+        })
+        .finally(() => {
+            hideLoading();
+        });
+    }
 
-            // Display training results
-            const metrics = data.metrics;
-            const isRegression = data.model_type.includes('regressor') || data.model_type === 'linear_regression';
-            
-            let metricsHtml = `
-                <div class="alert alert-success fade-in">
-                    <h4><i class="fas fa-chart-line"></i> Model Training Results</h4>
-                    
-                    <!-- Train-Test Split Information -->
-                    <div class="card mb-3">
-                        <div class="card-header">
-                            <i class="fas fa-random"></i> Train-Test Split
+    // Training runs as a background job; poll it until it finishes
+    function pollTrainingJob(jobId) {
+        fetch(`/jobs/${jobId}`)
+        .then(response => response.json())
+        .then(job => {
+            if (job.error && !job.status) {
+                showToast(job.error, 'error');
+                return;
+            }
+            if (job.status === 'succeeded') {
+                showTrainingResults(job.result);
+                showToast('Model trained successfully!', 'success');
+            } else if (job.status === 'failed') {
+                document.getElementById('trainingResults').innerHTML = '';
+                showToast(`Error training model: ${job.error}`, 'error');
+            } else if (job.status === 'cancelled') {
+                document.getElementById('trainingResults').innerHTML = '';
+                showToast('Training cancelled', 'info');
+            } else {
+                showTrainingProgress(job);
+                setTimeout(() => pollTrainingJob(jobId), 1000);
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            showToast('Error checking training progress', 'error');
+        });
+    }
+
+    function showTrainingProgress(job) {
+        const percent = Math.round((job.progress || 0) * 100);
+        document.getElementById('trainingResults').innerHTML = `
+            <div class="alert alert-info fade-in">
+                <h5><i class="fas fa-cog fa-spin"></i> Training model (${job.stage || job.status})</h5>
+                <div class="progress mb-2">
+                    <div class="progress-bar" style="width: ${percent}%">${percent}%</div>
+                </div>
+                <button class="btn btn-sm btn-outline-danger" id="cancelTraining">Cancel</button>
+            </div>
+        `;
+        document.getElementById('cancelTraining').onclick = () => {
+            fetch(`/jobs/${job.job_id}`, { method: 'DELETE' });
+        };
+    }
+
+    function showTrainingResults(data) {
+        // Display training results
+        const metrics = data.metrics;
+        const isRegression = data.model_type.includes('regressor') || data.model_type === 'linear_regression';
+        
+        let metricsHtml = `
+            <div class="alert alert-success fade-in">
+                <h4><i class="fas fa-chart-line"></i> Model Training Results</h4>
+                
+                <!-- Train-Test Split Information -->
+                <div class="card mb-3">
+                    <div class="card-header">
+                        <i class="fas fa-random"></i> Train-Test Split
+                    </div>
+                    <div class="card-body">
+                        <div class="row">
+                            <div class="col-md-6">
+                                <h5>Training Set</h5>
+                                <p>${metrics.split_info.train_size} samples (${metrics.split_info.train_percentage}%)</p>
+                            </div>
+                            <div class="col-md-6">
+                                <h5>Test Set</h5>
+                                <p>${metrics.split_info.test_size} samples (${metrics.split_info.test_percentage}%)</p>
+                            </div>
                         </div>
-                        <div class="card-body">
-                            <div class="row">
-                                <div class="col-md-6">
-                                    <h5>Training Set</h5>
-                                    <p>${metrics.split_info.train_size} samples (${metrics.split_info.train_percentage}%)</p>
-                                </div>
-                                <div class="col-md-6">
-                                    <h5>Test Set</h5>
-                                    <p>${metrics.split_info.test_size} samples (${metrics.split_info.test_percentage}%)</p>
-                                </div>
+                    </div>
+                </div>
+
+                <!-- Model Performance Metrics -->
+                <div class="card mb-3">
+                    <div class="card-header">
+                        <i class="fas fa-chart-bar"></i> Model Performance
+                    </div>
+                    <div class="card-body">
+                        <div class="row">
+                            <div class="col-md-6">
+                                <h5>Training Performance</h5>
+                                <ul class="list-unstyled">
+                                    ${isRegression ? `
+                                        <li>R² Score: ${(metrics.train_r2 * 100).toFixed(2)}%</li>
+                                        <li>Mean Squared Error: ${metrics.train_mse.toFixed(4)}</li>
+                                        <li>Mean Absolute Error: ${metrics.train_mae.toFixed(4)}</li>
+                                    ` : `
+                                        <li>Accuracy: ${(metrics.train_score * 100).toFixed(2)}%</li>
+                                        ${metrics.train_precision ? `
+                                            <li>Precision: ${(metrics.train_precision * 100).toFixed(2)}%</li>
+                                            <li>Recall: ${(metrics.train_recall * 100).toFixed(2)}%</li>
+                                            <li>F1 Score: ${(metrics.train_f1 * 100).toFixed(2)}%</li>
+                                        ` : ''}
+                                    `}
+                                </ul>
+                            </div>
+                            <div class="col-md-6">
+                                <h5>Test Performance</h5>
+                                <ul class="list-unstyled">
+                                    ${isRegression ? `
+                                        <li>R² Score: ${(metrics.test_r2 * 100).toFixed(2)}%</li>
+                                        <li>Mean Squared Error: ${metrics.test_mse.toFixed(4)}</li>
+                                        <li>Mean Absolute Error: ${metrics.test_mae.toFixed(4)}</li>
+                                    ` : `
+                                        <li>Accuracy: ${(metrics.test_score * 100).toFixed(2)}%</li>
+                                        ${metrics.test_precision ? `
+                                            <li>Precision: ${(metrics.test_precision * 100).toFixed(2)}%</li>
+                                            <li>Recall: ${(metrics.test_recall * 100).toFixed(2)}%</li>
+                                            <li>F1 Score: ${(metrics.test_f1 * 100).toFixed(2)}%</li>
+                                        ` : ''}
+                                    `}
+                                </ul>
                             </div>
                         </div>
                     </div>
+                </div>
 
-                    <!-- Model Performance Metrics -->
+                ${data.training_stats ? `
+                    <!-- Feature Matrix -->
                     <div class="card mb-3">
                         <div class="card-header">
-                            <i class="fas fa-chart-bar"></i> Model Performance
+                            <i class="fas fa-th"></i> Feature Matrix
                         </div>
                         <div class="card-body">
-                            <div class="row">
-                                <div class="col-md-6">
-                                    <h5>Training Performance</h5>
-                                    <ul class="list-unstyled">
-                                        ${isRegression ? `
-                                            <li>R² Score: ${(metrics.train_r2 * 100).toFixed(2)}%</li>
-                                            <li>Mean Squared Error: ${metrics.train_mse.toFixed(4)}</li>
-                                            <li>Mean Absolute Error: ${metrics.train_mae.toFixed(4)}</li>
-                                        ` : `
-                                            <li>Accuracy: ${(metrics.train_score * 100).toFixed(2)}%</li>
-                                            ${metrics.train_precision ? `
-                                                <li>Precision: ${(metrics.train_precision * 100).toFixed(2)}%</li>
-                                                <li>Recall: ${(metrics.train_recall * 100).toFixed(2)}%</li>
-                                                <li>F1 Score: ${(metrics.train_f1 * 100).toFixed(2)}%</li>
-                                            ` : ''}
-                                        `}
-                                    </ul>
-                                </div>
-                                <div class="col-md-6">
-                                    <h5>Test Performance</h5>
-                                    <ul class="list-unstyled">
-                                        ${isRegression ? `
-                                            <li>R² Score: ${(metrics.test_r2 * 100).toFixed(2)}%</li>
-                                            <li>Mean Squared Error: ${metrics.test_mse.toFixed(4)}</li>
-                                            <li>Mean Absolute Error: ${metrics.test_mae.toFixed(4)}</li>
-                                        ` : `
-                                            <li>Accuracy: ${(metrics.test_score * 100).toFixed(2)}%</li>
-                                            ${metrics.test_precision ? `
-                                                <li>Precision: ${(metrics.test_precision * 100).toFixed(2)}%</li>
-                                                <li>Recall: ${(metrics.test_recall * 100).toFixed(2)}%</li>
-                                                <li>F1 Score: ${(metrics.test_f1 * 100).toFixed(2)}%</li>
-                                            ` : ''}
-                                        `}
-                                    </ul>
-                                </div>
-                            </div>
+                            <p>${data.training_stats.n_features} features, ${data.training_stats.sparse ? 'sparse' : 'dense'}:
+                               ${(data.training_stats.matrix_bytes / 1048576).toFixed(2)} MB
+                               (${(data.training_stats.dense_bytes / 1048576).toFixed(2)} MB if dense)</p>
+                            <p>Encoding ${data.training_stats.encode_seconds.toFixed(3)}s, fitting ${data.training_stats.fit_seconds.toFixed(3)}s</p>
+                            ${data.screening && data.screening.dropped.length ? `
+                                <p>Columns left out:</p>
+                                <ul class="list-unstyled">
+                                    ${data.screening.dropped.map(d => `<li>${d.column} <small class="text-muted">(${d.reason})</small></li>`).join('')}
+                                </ul>
+                            ` : ''}
                         </div>
                     </div>
+                ` : ''}
 
-                    ${data.feature_importance ? `
-                        <!-- Feature Importance -->
-                        <div class="card">
-                            <div class="card-header">
-                                <i class="fas fa-list-ol"></i> Top Feature Importance
-                            </div>
-                            <div class="card-body">
-                                <ul class="feature-list">
-                                    ${Object.entries(data.feature_importance)
-                                        .sort((a, b) => b[1] - a[1])
-                                        .slice(0, 5)
-                                        .map(([feature, importance]) => `
-                                            <li>
-                                                <span class="feature-name">${feature}</span>
-                                                <div class="progress">
-                                                    <div class="progress-bar" style="width: ${(importance * 100).toFixed(2)}%"></div>
-                                                </div>
-                                                <small class="text-muted">${(importance * 100).toFixed(2)}% importance</small>
-                                            </li>
-                                        `).join('')}
-                                </ul>
-                            </div>
+                ${data.feature_importance ? `
+                    <!-- Feature Importance -->
+                    <div class="card">
+                        <div class="card-header">
+                            <i class="fas fa-list-ol"></i> Top Feature Importance
                         </div>
-                    ` : ''}
-                </div>
-            `;
-
-            document.getElementById('trainingResults').innerHTML = metricsHtml;
-
-            // Show download button
-            const downloadSection = document.getElementById('downloadSection');
-            downloadSection.style.display = 'block';
-            downloadSection.querySelector('#downloadModel').onclick = () => {
-                window.location.href = `/download_model/${data.model_filename}`;
-            };
-
-            // Show visualization section and load visualizations
-            document.getElementById('visualizationSection').style.display = 'block';
-            document.getElementById('visualizationSection').classList.add('fade-in');
-            loadVisualizations();
-            
-            showToast('Model trained successfully!', 'success');
-        })
-        .catch(error => {
-            console.error('Error:', error);
-            showToast('Error training model', 'error');
-        })
-        .finally(() => {
-            hideLoading();
-        });
+                        <div class="card-body">
+                            <ul class="feature-list">
+                                ${Object.entries(data.feature_importance)
+                                    .sort((a, b) => b[1] - a[1])
+                                    .slice(0, 5)
+                                    .map(([feature, importance]) => `
+                                        <li>
+                                            <span class="feature-name">${feature}</span>
+                                            <div class="progress">
+                                                <div class="progress-bar" style="width: ${(importance * 100).toFixed(2)}%"></div>
+                                            </div>
+                                            <small class="text-muted">${(importance * 100).toFixed(2)}% importance</small>
+                                        </li>
+                                    `).join('')}
+                            </ul>
+                        </div>
+                    </div>
+                ` : ''}
+            </div>
+        `;
+
+        document.getElementById('trainingResults').innerHTML = metricsHtml;
+
+        // Show download button
+        const downloadSection = document.getElementById('downloadSection');
+        downloadSection.style.display = 'block';
+        downloadSection.querySelector('#downloadModel').onclick = () => {
+            window.location.href = `/download_model/${data.model_filename}`;
+        };
+
+        // Show visualization section and load visualizations
+        document.getElementById('visualizationSection').style.display = 'block';
+        document.getElementById('visualizationSection').classList.add('fade-in');
+        loadVisualizations();
     }
 
     function loadDataPreview() {
         showLoading();
-        fetch('/preview')
+        fetch(withDataset('/preview'))
         .then(response => response.json())
         .then(data => {
             if (data.error) {
@@ -331,7 +409,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     function loadAnalysis() {
         showLoading();
-        fetch('/analyze')
+        fetch(withDataset('/analyze'))
         .then(response => response.json())
         .then(data => {
             if (data.error) {
@@ -379,106 +457,125 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    const CHART_SECTIONS = {
+        distribution_plots: {type: 'distribution', title: 'Distribution Plots'},
+        correlation_matrix: {type: 'correlation', title: 'Correlation Matrix'},
+        scatter_plots: {type: 'scatter', title: 'Feature Relationships'}
+    };
+
     function loadVisualizations() {
         showLoading();
-        fetch('/visualize')
-        .then(response => response.json())
-        .then(data => {
-            if (data.error) {
-                showToast(data.error, 'error');
-                return;
-            }
-
-            const visualizationsDiv = document.getElementById('visualizations');
-            visualizationsDiv.innerHTML = '';
-
-            // Handle distribution plots
-            if (data.distribution_plots && data.distribution_plots.length > 0) {
-                const container = document.createElement('div');
-                container.className = 'visualization-container fade-in';
-                container.dataset.type = 'distribution';
-                container.innerHTML = '<h4>Distribution Plots</h4>';
-                
-                data.distribution_plots.forEach((plot, index) => {
-                    const plotDiv = document.createElement('div');
-                    plotDiv.id = `dist-plot-${index}`;
-                    container.appendChild(plotDiv);
-                    
-                    setTimeout(() => {
-                        Plotly.newPlot(`dist-plot-${index}`, plot.plot.data, plot.plot.layout);
-                    }, index * 100);
+        const visualizationsDiv = document.getElementById('visualizations');
+        let insights = [];
+
+        // Charts arrive one NDJSON line each, in the order they finish
+        fetch(withDataset('/visualize') + (currentDatasetId ? '&' : '?') + 'stream=ndjson')
+        .then(response => {
+            if ((response.headers.get('Content-Type') || '').includes('application/json')) {
+                return response.json().then(data => {
+                    throw new Error(data.error || 'Error loading visualizations');
                 });
-                
-                visualizationsDiv.appendChild(container);
-            }
-
-            // Handle correlation matrix
-            if (data.correlation_matrix) {
-                const container = document.createElement('div');
-                container.className = 'visualization-container fade-in';
-                container.dataset.type = 'correlation';
-                container.innerHTML = '<h4>Correlation Matrix</h4>';
-                
-                const plotDiv = document.createElement('div');
-                plotDiv.id = 'corr-matrix';
-                container.appendChild(plotDiv);
-                
-                setTimeout(() => {
-                    Plotly.newPlot('corr-matrix', data.correlation_matrix.data, data.correlation_matrix.layout);
-                }, 100);
-                
-                visualizationsDiv.appendChild(container);
             }
-
-            // Handle scatter plots
-            if (data.scatter_plots && data.scatter_plots.length > 0) {
-                const container = document.createElement('div');
-                container.className = 'visualization-container fade-in';
-                container.dataset.type = 'scatter';
-                container.innerHTML = '<h4>Feature Relationships</h4>';
-                
-                data.scatter_plots.forEach((plot, index) => {
-                    const plotDiv = document.createElement('div');
-                    plotDiv.id = `scatter-plot-${index}`;
-                    container.appendChild(plotDiv);
-                    
-                    setTimeout(() => {
-                        Plotly.newPlot(`scatter-plot-${index}`, plot.plot.data, plot.plot.layout);
-                    }, index * 100);
-                });
-                
-                visualizationsDiv.appendChild(container);
-            }
-
+            return readLines(response, line => {
+                const message = JSON.parse(line);
+                if (message.event === 'plan') {
+                    visualizationsDiv.innerHTML = '';
+                    layoutCharts(visualizationsDiv, message.charts);
+                    // The first chart replaces the spinner; the rest fill in
+                    hideLoading();
+                    const visualizationSection = document.getElementById('visualizationSection');
+                    if (visualizationSection) {
+                        visualizationSection.style.display = 'block';
+                    }
+                } else if (message.event === 'chart') {
+                    renderChart(message);
+                } else if (message.event === 'done') {
+                    insights = message.insights || [];
+                    console.log(`Dashboard built in ${message.total_ms} ms`, message.timings);
+                }
+            });
+        })
+        .then(() => {
             // Handle insights
-            if (data.insights && data.insights.length > 0) {
+            if (insights.length > 0) {
                 const insightsContainer = document.createElement('div');
                 insightsContainer.className = 'insights-container fade-in';
                 insightsContainer.innerHTML = '<h4>Key Insights</h4><ul class="insights-list">';
                 
-                data.insights.forEach(insight => {
+                insights.forEach(insight => {
                     insightsContainer.innerHTML += `<li>${insight.message}</li>`;
                 });
                 
                 insightsContainer.innerHTML += '</ul>';
                 visualizationsDiv.appendChild(insightsContainer);
             }
-
-            // Show the visualization section
-            const visualizationSection = document.getElementById('visualizationSection');
-            if (visualizationSection) {
-                visualizationSection.style.display = 'block';
-            }
         })
         .catch(error => {
             console.error('Error:', error);
-            showToast('Error loading visualizations', 'error');
+            showToast(error.message || 'Error loading visualizations', 'error');
         })
         .finally(() => {
             hideLoading();
         });
     }
 
+    function readLines(response, onLine) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        function pump() {
+            return reader.read().then(({done, value}) => {
+                buffer += decoder.decode(value || new Uint8Array(), {stream: !done});
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                lines.filter(line => line.trim()).forEach(onLine);
+                if (done) {
+                    if (buffer.trim()) {
+                        onLine(buffer);
+                    }
+                    return;
+                }
+                return pump();
+            });
+        }
+        return pump();
+    }
+
+    function layoutCharts(visualizationsDiv, charts) {
+        // One container per section and a placeholder per chart, so charts
+        // keep their places whatever order they finish in
+        const containers = {};
+        charts.forEach(chart => {
+            if (!containers[chart.section]) {
+                const section = CHART_SECTIONS[chart.section];
+                const container = document.createElement('div');
+                container.className = 'visualization-container fade-in';
+                container.dataset.type = section.type;
+                container.innerHTML = `<h4>${section.title}</h4>`;
+                visualizationsDiv.appendChild(container);
+                containers[chart.section] = container;
+            }
+            const plotDiv = document.createElement('div');
+            plotDiv.id = `chart-${chart.index}`;
+            containers[chart.section].appendChild(plotDiv);
+        });
+    }
+
+    function renderChart(message) {
+        const plotDiv = document.getElementById(`chart-${message.index}`);
+        if (!plotDiv) {
+            return;
+        }
+        if (!message.chart) {
+            // Nothing to draw (empty column) or the chart failed
+            plotDiv.remove();
+            return;
+        }
+        const plot = message.chart.plot;
+        Plotly.newPlot(plotDiv.id, plot.data, plot.layout);
+    }
+
     // Chart type filter
     document.getElementById('chartType').addEventListener('change', function(e) {
         const selectedType = e.target.value;
@@ -0,0 +1,150 @@
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from vizpro_common.dataset_cache import DatasetCache
+from vizpro_common.downsampling import (DEFAULT_MAX_POINTS, sample_points, density_grid, scatter_method,
+                                        reduction_info, annotate_reduction)
+from vizpro_common.plot_json import figure_payload
+
+THEME = {
+    'paper_bgcolor': 'rgba(0,0,0,0)',
+    'plot_bgcolor': 'rgba(0,0,0,0.05)',
+    'font': {'color': '#ffffff'}
+}
+
+# The dataset cache of a chart worker process and its last loaded DataFrame
+_worker_cache = None
+_worker_frame = (None, None)
+
+
+def distribution_chart(df, col):
+    """Histogram entry of ``/visualize``, or None if the column is empty."""
+    # Handle NaN values
+    clean_data = df[col].dropna()
+    if len(clean_data) == 0:
+        return None
+
+    fig = px.histogram(
+        clean_data,
+        title=f'Distribution of {col}',
+        template='plotly_dark',
+        color_discrete_sequence=['#4facfe']
+    )
+    fig.update_layout(**THEME)
+    return {
+        'name': col,
+        'plot': figure_payload(fig)
+    }
+
+
+def correlation_chart(df, numerical_cols):
+    """Correlation heatmap and the insights on its strongest pairs."""
+    # Handle NaN values in correlation matrix
+    corr_matrix = df[numerical_cols].fillna(0).corr()
+    fig = px.imshow(
+        corr_matrix,
+        title='Correlation Matrix',
+        template='plotly_dark',
+        color_continuous_scale=['#00f2fe', '#ffffff', '#4facfe']
+    )
+    fig.update_layout(**THEME)
+    plot = figure_payload(fig)
+
+    # Generate correlation insights
+    insights = []
+    np.fill_diagonal(corr_matrix.values, 0)
+    strongest_corr = np.abs(corr_matrix).unstack().sort_values(ascending=False)[:5]
+    for (col1, col2), corr_value in strongest_corr.items():
+        if col1 != col2:
+            insights.append({
+                'type': 'correlation',
+                'message': f'Strong {("positive" if corr_value > 0 else "negative")} correlation ({corr_value:.2f}) between {col1} and {col2}'
+            })
+    return {'plot': plot, 'insights': insights}
+
+
+def scatter_chart(df, col1, col2, max_points=DEFAULT_MAX_POINTS):
+    """Scatter entry for a column pair, reduced to ``max_points``; None if empty."""
+    # Handle NaN values
+    clean_data = df[[col1, col2]].dropna()
+    if len(clean_data) == 0:
+        return None
+
+    if scatter_method(clean_data, col1, col2, max_points) == 'bin':
+        # Too many points even to sample: draw their density
+        x, y, z, clipped = density_grid(clean_data[col1], clean_data[col2])
+        fig = go.Figure(go.Heatmap(x=x, y=y, z=z, colorscale='Blues'))
+        fig.update_layout(title=f'{col1} vs {col2}', template='plotly_dark',
+                          xaxis_title=col1, yaxis_title=col2)
+        cells = int(np.count_nonzero(~np.isnan(z)))
+        info = reduction_info(len(clean_data), cells, 'bin', clipped)
+    else:
+        clean_data, info = sample_points(clean_data, max_points, [col1, col2])
+        fig = px.scatter(
+            clean_data,
+            x=col1,
+            y=col2,
+            title=f'{col1} vs {col2}',
+            template='plotly_dark',
+            color_discrete_sequence=['#4facfe']
+        )
+    fig.update_layout(**THEME)
+    annotate_reduction(fig, info)
+    return {
+        'name': f'{col1} vs {col2}',
+        'plot': figure_payload(fig),
+        'downsampling': info
+    }
+
+
+def dashboard_charts(numerical_cols, max_points=DEFAULT_MAX_POINTS):
+    """The charts of the ``/visualize`` dashboard as independent specs.
+
+    Each spec names the response ``section`` it fills and the chart, and
+    gives the ``kind`` and ``params`` that both build it (render_chart)
+    and key it in the figure cache. Specs are plain data, so they can be
+    built in any order, at the same time, and in other processes.
+    """
+    specs = [
+        {'section': 'distribution_plots', 'name': col, 'kind': 'distribution', 'params': {'column': col}}
+        for col in numerical_cols
+    ]
+    if len(numerical_cols) > 1:
+        specs.append({'section': 'correlation_matrix', 'name': 'Correlation Matrix', 'kind': 'correlation',
+                      'params': {'columns': numerical_cols}})
+        for col1, col2 in zip(numerical_cols, numerical_cols[1:]):
+            specs.append({'section': 'scatter_plots', 'name': f'{col1} vs {col2}', 'kind': 'scatter',
+                          'params': {'x': col1, 'y': col2, 'max_points': max_points}})
+    return specs
+
+
+def render_chart(df, kind, params):
+    """Build one dashboard chart of ``df`` from its spec."""
+    if kind == 'distribution':
+        return distribution_chart(df, params['column'])
+    if kind == 'correlation':
+        return correlation_chart(df, params['columns'])
+    if kind == 'scatter':
+        return scatter_chart(df, params['x'], params['y'], params['max_points'])
+    raise ValueError(f"Unknown chart kind: {kind}")
+
+
+def init_worker(cache_directory):
+    global _worker_cache
+    _worker_cache = DatasetCache(cache_directory)
+
+
+def render_cached_chart(cache_key, kind, params):
+    """Worker side: build a chart of a dataset read from the dataset cache.
+
+    Charts of one dashboard share a dataset, so the last one read is kept.
+    """
+    global _worker_frame
+    key, df = _worker_frame
+    if key != cache_key:
+        df = _worker_cache.get(cache_key)
+        if df is None:
+            raise KeyError(f"Dataset {cache_key} is no longer cached")
+        _worker_frame = (cache_key, df)
+    return render_chart(df, kind, params)
@@ -0,0 +1,181 @@
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Categorical columns with more distinct training values than this are
+# frequency or hash encoded instead of one-hot encoded
+DEFAULT_MAX_CATEGORIES = 50
+DEFAULT_HASH_BUCKETS = 32
+HIGH_CARDINALITY_STRATEGIES = ('frequency', 'hash')
+
+# Screening: columns at least this empty carry too little to train on
+MAX_NULL_RATIO = 0.95
+# Text columns with this share of distinct values identify rows, as do
+# integer columns counting up or down by one (row numbers)
+ID_UNIQUE_RATIO = 0.95
+# ... and so do columns named like an ID above this share (Customer ID)
+NAMED_ID_UNIQUE_RATIO = 0.05
+_ID_NAME = re.compile(r'(^|[^a-z])id([^a-z]|$)')
+
+
+def screen_columns(X):
+    """Pick the columns of ``X`` worth training on.
+
+    Empty or nearly empty columns, constants and identifiers (row numbers,
+    order or customer IDs) are dropped: they add width, and with one-hot
+    encoding most of the cost, without adding signal. Returns ``(keep,
+    report)``; the report lists every dropped column with its reason.
+    """
+    rows = len(X)
+    # One pass of column-wise reductions decides every column
+    non_null = X.notna().sum()
+    unique = X.nunique()
+    variance = X.select_dtypes(include='number').var()
+
+    keep, dropped = [], []
+    for col in X.columns:
+        null_ratio = 1 - non_null[col] / rows if rows else 1.0
+        unique_ratio = unique[col] / non_null[col] if non_null[col] else 0.0
+        is_float = pd.api.types.is_float_dtype(X[col])
+        is_text = X[col].dtype == object or isinstance(X[col].dtype, pd.CategoricalDtype)
+
+        if null_ratio >= MAX_NULL_RATIO:
+            reason = 'empty' if non_null[col] == 0 else 'mostly empty'
+        elif unique[col] <= 1 or variance.get(col) == 0:
+            reason = 'constant'
+        elif (unique_ratio >= ID_UNIQUE_RATIO and (is_text or _is_row_number(X[col]))) or \
+                (not is_float and unique_ratio >= NAMED_ID_UNIQUE_RATIO and _ID_NAME.search(str(col).lower())):
+            reason = 'identifier'
+        else:
+            keep.append(col)
+            continue
+        dropped.append({
+            'column': col,
+            'reason': reason,
+            'null_ratio': round(float(null_ratio), 4),
+            'unique_ratio': round(float(unique_ratio), 4)
+        })
+    return keep, {'kept': keep, 'dropped': dropped}
+
+
+class FeatureEncoder:
+    """Fitted replacement for ``pd.get_dummies`` that is saved with the model.
+
+    Numeric columns pass through. Categorical columns with at most
+    ``max_categories`` training values are one-hot encoded, named like
+    get_dummies (``<column>_<value>``); values unseen in training and
+    missing values encode as all zeros. Wider columns become one
+    ``<column>_frequency`` column (the value's share of the training rows)
+    or, with ``high_cardinality='hash'``, ``hash_buckets`` hashed indicator
+    columns. transform() returns a scipy CSR matrix whose columns always
+    match ``feature_names_``, whatever the new data looks like.
+    """
+
+    def __init__(self, max_categories=DEFAULT_MAX_CATEGORIES, high_cardinality='frequency',
+                 hash_buckets=DEFAULT_HASH_BUCKETS):
+        if high_cardinality not in HIGH_CARDINALITY_STRATEGIES:
+            raise ValueError(f"high_cardinality must be one of {HIGH_CARDINALITY_STRATEGIES}")
+        self.max_categories = max_categories
+        self.high_cardinality = high_cardinality
+        self.hash_buckets = hash_buckets
+        # One (column, kind, state) entry per input column, in output order
+        self.columns_ = []
+        self.feature_names_ = []
+
+    def fit(self, X):
+        self.columns_ = []
+        self.feature_names_ = []
+        for col in X.columns:
+            series = X[col]
+            if _is_numeric(series):
+                self.columns_.append((col, 'numeric', None))
+                self.feature_names_.append(col)
+                continue
+
+            counts = _labels(series).value_counts()
+            if len(counts) <= self.max_categories:
+                # get_dummies orders dummy columns by sorted value
+                levels = sorted(counts.index)
+                self.columns_.append((col, 'onehot', levels))
+                self.feature_names_.extend(f'{col}_{level}' for level in levels)
+            elif self.high_cardinality == 'frequency':
+                frequencies = (counts / len(series)).to_dict()
+                self.columns_.append((col, 'frequency', frequencies))
+                self.feature_names_.append(f'{col}_frequency')
+            else:
+                self.columns_.append((col, 'hash', self.hash_buckets))
+                self.feature_names_.extend(f'{col}_hash_{i}' for i in range(self.hash_buckets))
+        return self
+
+    def transform(self, X):
+        """Encode ``X`` into a CSR matrix with one column per feature name."""
+        n_rows = len(X)
+        rows, cols, data = [], [], []
+        offset = 0
+        for col, kind, state in self.columns_:
+            if col in X.columns:
+                r, c, d = self._encode(X[col], kind, state)
+                rows.append(r)
+                cols.append(c + offset)
+                data.append(d)
+            # A column missing from new data encodes as zeros
+            offset += _width(kind, state)
+
+        if rows:
+            rows, cols, data = np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+        return sparse.csr_matrix((data, (rows, cols)), shape=(n_rows, offset), dtype=np.float64)
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def _encode(self, series, kind, state):
+        """Row indices, column offsets and values of one column's non-zeros."""
+        if kind == 'numeric':
+            values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+            # NaN is kept so estimators report missing values as before
+            rows = np.flatnonzero(values != 0)
+            return rows, np.zeros(len(rows), dtype=np.int64), values[rows]
+
+        labels = _labels(series)
+        if kind == 'onehot':
+            codes = pd.Categorical(labels, categories=state).codes
+            rows = np.flatnonzero(codes >= 0)
+            return rows, codes[rows].astype(np.int64), np.ones(len(rows))
+        if kind == 'frequency':
+            values = labels.map(state).fillna(0).to_numpy(dtype=np.float64)
+            rows = np.flatnonzero(values)
+            return rows, np.zeros(len(rows), dtype=np.int64), values[rows]
+
+        present = labels.notna().to_numpy()
+        rows = np.flatnonzero(present)
+        hashes = pd.util.hash_pandas_object(labels[present], index=False).to_numpy()
+        return rows, (hashes % np.uint64(state)).astype(np.int64), np.ones(len(rows))
+
+
+def _is_row_number(series):
+    """True for whole numbers that step by exactly one from row to row."""
+    if not pd.api.types.is_integer_dtype(series) or len(series) < 2:
+        return False
+    steps = np.diff(series.dropna().to_numpy(dtype=np.int64))
+    return bool((steps == 1).all() or (steps == -1).all())
+
+
+def _is_numeric(series):
+    # Like get_dummies, booleans pass through as numbers
+    return pd.api.types.is_numeric_dtype(series)
+
+
+def _labels(series):
+    """Values as strings (NaN kept), so training and scoring files compare equal."""
+    values = series.astype(object)
+    return values.where(values.isna(), values.astype(str)).reset_index(drop=True)
+
+
+def _width(kind, state):
+    if kind == 'onehot':
+        return len(state)
+    if kind == 'hash':
+        return state
+    return 1
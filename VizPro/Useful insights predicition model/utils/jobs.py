@@ -0,0 +1,185 @@
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_MAX_WORKERS = 2
+# Finished jobs are kept this long for clients to collect their results
+DEFAULT_MAX_AGE = 24 * 3600
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation has been requested."""
+
+
+class JobManager:
+    """Background jobs run in a process pool, with status kept on disk.
+
+    Job state lives in JSON files in ``directory``, so any worker process
+    sharing it can report on or cancel any job. ``max_workers`` caps the
+    jobs running at once per server process; the rest wait in the queue.
+    Job functions are called as ``fn(*args, progress)`` and must be
+    importable from the worker; ``progress(stage, fraction)`` records how
+    far they got and raises JobCancelled once a cancel was requested.
+    """
+
+    def __init__(self, directory, max_workers=DEFAULT_MAX_WORKERS, max_age=DEFAULT_MAX_AGE):
+        self.directory = os.path.abspath(directory)
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self._executor = None
+        self._futures = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def submit(self, fn, *args, kind='job', **metadata):
+        """Queue ``fn(*args, progress)`` and return the new job's status."""
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'kind': kind,
+            'status': 'queued',
+            'stage': None,
+            'progress': 0.0,
+            'created': time.time(),
+            'started': None,
+            'finished': None,
+            'result': None,
+            'error': None,
+            **metadata
+        }
+        _write_job(self.directory, job)
+        with self._lock:
+            future = self._pool().submit(_run_job, self.directory, job_id, fn, args)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        self.expire()
+        return job
+
+    def status(self, job_id):
+        """Return a job's status, raising KeyError if unknown."""
+        return _read_job(self.directory, job_id)
+
+    def cancel(self, job_id):
+        """Ask a job to stop; queued jobs are cancelled right away."""
+        job = self.status(job_id)
+        if job['status'] in FINISHED_STATES:
+            return job
+
+        open(_cancel_path(self.directory, job_id), 'w').close()
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            return _update_job(self.directory, job_id, status='cancelled', finished=time.time())
+        # A running job notices the flag at its next progress report
+        return self.status(job_id)
+
+    def expire(self):
+        """Delete finished jobs older than ``max_age`` seconds.
+
+        Queued and running jobs are kept however old they are, along with
+        their cancel flags. Leftover temporary files and flags whose job is
+        gone go once they are that old too.
+        """
+        cutoff = time.time() - self.max_age
+        for name in os.listdir(self.directory):
+            job_id, extension = os.path.splitext(name)
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                if extension in ('.json', '.cancel'):
+                    try:
+                        job = _read_job(self.directory, job_id)
+                    except KeyError:
+                        job = None
+                    if job is not None and job['status'] not in FINISHED_STATES:
+                        continue
+                os.remove(path)
+            except OSError:
+                pass
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+    def _pool(self):
+        if self._executor is None:
+            # Spawned workers do not inherit the server's threads and locks
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+
+def _run_job(directory, job_id, fn, args):
+    """Worker side: run one job and record its outcome."""
+    def progress(stage, fraction):
+        if os.path.exists(_cancel_path(directory, job_id)):
+            raise JobCancelled()
+        _update_job(directory, job_id, stage=stage, progress=round(float(fraction), 3))
+
+    try:
+        progress('starting', 0.0)
+        _update_job(directory, job_id, status='running', started=time.time())
+        result = fn(*args, progress)
+    except JobCancelled:
+        _update_job(directory, job_id, status='cancelled', finished=time.time())
+    except Exception as e:
+        traceback.print_exc()
+        _update_job(directory, job_id, status='failed', error=str(e), finished=time.time())
+    else:
+        _update_job(directory, job_id, status='succeeded', progress=1.0, stage='done',
+                    result=result, finished=time.time())
+    finally:
+        try:
+            os.remove(_cancel_path(directory, job_id))
+        except OSError:
+            pass
+
+
+def _job_path(directory, job_id):
+    if not isinstance(job_id, str) or not job_id.isalnum():
+        raise KeyError(f"Unknown job: {job_id}")
+    return os.path.join(directory, job_id + '.json')
+
+
+def _cancel_path(directory, job_id):
+    return os.path.join(directory, job_id + '.cancel')
+
+
+def _read_job(directory, job_id):
+    try:
+        with open(_job_path(directory, job_id)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        raise KeyError(f"Unknown job: {job_id}")
+
+
+def _write_job(directory, job):
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(job, f)
+    os.replace(tmp_path, _job_path(directory, job['job_id']))
+
+
+def _update_job(directory, job_id, **changes):
+    # Only the worker running a job writes it after it was queued, so a
+    # read-modify-write needs no lock across processes
+    job = _read_job(directory, job_id)
+    job.update(changes)
+    _write_job(directory, job)
+    return job
@@ -0,0 +1,200 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import joblib
+
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+DEFAULT_MAX_MODELS = 8
+# Handles untouched for this long are forgotten
+DEFAULT_MAX_AGE = 7 * 24 * 3600
+
+
+def read_model(path):
+    """Load a model bundle saved by training.save_model, or a legacy ``.pkl``."""
+    # Uncompressed artifacts are memory-mapped: large arrays are paged in
+    # from disk on use instead of read and copied up front
+    mmap_mode = 'r' if path.endswith('.joblib') else None
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+class DatasetRegistry:
+    """Datasets and trained models of every session, keyed by handle.
+
+    Handles are small JSON files in ``directory`` pointing at a
+    DatasetCache entry and the latest model file, so every worker process
+    sharing the directories sees every session. Each process keeps the
+    DataFrames it has loaded in memory up to ``memory_budget`` bytes,
+    evicting the least recently used; identical uploads share one copy.
+    """
+
+    def __init__(self, directory, cache, models_dir, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 max_models=DEFAULT_MAX_MODELS, max_age=DEFAULT_MAX_AGE):
+        self.directory = directory
+        self.cache = cache
+        self.models_dir = models_dir
+        self.memory_budget = memory_budget
+        self.max_models = max_models
+        self.max_age = max_age
+        # cache_key -> {'df', 'bytes', 'row_orders'}
+        self._frames = OrderedDict()
+        # model filename -> loaded model bundle
+        self._models = OrderedDict()
+        self._model_stats = {'warm_hits': 0, 'cold_loads': 0, 'cold_load_seconds': 0.0}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def create(self, df, cache_key, filename=None):
+        """Register an uploaded DataFrame and return its new handle."""
+        dataset_id = uuid.uuid4().hex
+        self._write_handle({
+            'dataset_id': dataset_id,
+            'cache_key': cache_key,
+            'filename': filename,
+            'created': time.time(),
+            'model_filename': None
+        })
+        with self._lock:
+            self._remember_frame(cache_key, df)
+        self.expire()
+        return dataset_id
+
+    def handle(self, dataset_id):
+        """Return the stored handle, raising KeyError if unknown."""
+        path = self._handle_path(dataset_id)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise KeyError(f"Unknown dataset: {dataset_id}")
+
+    def get_data(self, dataset_id):
+        """Return the DataFrame behind a handle, loading it from the cache if needed."""
+        cache_key = self.handle(dataset_id)['cache_key']
+        # Using a handle keeps it from expiring
+        os.utime(self._handle_path(dataset_id))
+        with self._lock:
+            if cache_key in self._frames:
+                self._frames.move_to_end(cache_key)
+                return self._frames[cache_key]['df']
+
+        df = self.cache.get(cache_key)
+        if df is None:
+            raise KeyError(f"Data for dataset {dataset_id} is no longer cached")
+        with self._lock:
+            return self._remember_frame(cache_key, df)['df']
+
+    def row_orders(self, dataset_id):
+        """Per-process cache of sorted row orders for /rows."""
+        cache_key = self.handle(dataset_id)['cache_key']
+        self.get_data(dataset_id)
+        with self._lock:
+            frame = self._frames.get(cache_key)
+            # Evicted again in the meantime: sorts are simply not kept
+            return frame['row_orders'] if frame is not None else {}
+
+    def set_model(self, dataset_id, model_filename, bundle=None):
+        """Record the latest model trained on a dataset."""
+        handle = self.handle(dataset_id)
+        handle['model_filename'] = model_filename
+        self._write_handle(handle)
+        if bundle is not None:
+            with self._lock:
+                self._remember_model(model_filename, bundle)
+
+    def get_model(self, dataset_id):
+        """Return ``(model_filename, bundle)`` of the latest model, or ``(None, None)``."""
+        model_filename = self.handle(dataset_id)['model_filename']
+        if model_filename is None:
+            return None, None
+        return model_filename, self.load_model(model_filename)
+
+    def load_model(self, model_filename):
+        """Load a saved model bundle, keeping recent ones in memory."""
+        return self.fetch_model(model_filename)[0]
+
+    def fetch_model(self, model_filename):
+        """Return ``(bundle, warm)``; ``warm`` is False if it was read from disk."""
+        with self._lock:
+            if model_filename in self._models:
+                self._models.move_to_end(model_filename)
+                self._model_stats['warm_hits'] += 1
+                return self._models[model_filename], True
+        start = time.perf_counter()
+        bundle = read_model(os.path.join(self.models_dir, model_filename))
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._remember_model(model_filename, bundle)
+            self._model_stats['cold_loads'] += 1
+            self._model_stats['cold_load_seconds'] += elapsed
+        return bundle, False
+
+    def model_cache_stats(self):
+        """Warm hits and cold loads of this process' model cache."""
+        with self._lock:
+            stats = dict(self._model_stats)
+            stats['cached_models'] = len(self._models)
+        cold = stats.pop('cold_load_seconds')
+        stats['mean_cold_load_ms'] = round(1000 * cold / stats['cold_loads'], 3) if stats['cold_loads'] else None
+        return stats
+
+    def remove(self, dataset_id):
+        try:
+            os.remove(self._handle_path(dataset_id))
+            return True
+        except (KeyError, OSError):
+            return False
+
+    def expire(self):
+        """Forget handles that have not been used for ``max_age`` seconds."""
+        cutoff = time.time() - self.max_age
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith('.json') and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def memory_usage(self):
+        with self._lock:
+            return sum(frame['bytes'] for frame in self._frames.values())
+
+    def _remember_frame(self, cache_key, df):
+        frame = self._frames.get(cache_key)
+        if frame is None:
+            frame = {
+                'df': df,
+                'bytes': int(df.memory_usage(deep=True).sum()),
+                'row_orders': {}
+            }
+            self._frames[cache_key] = frame
+        self._frames.move_to_end(cache_key)
+        total = sum(f['bytes'] for f in self._frames.values())
+        # The frame just used always stays, even if it alone exceeds the budget
+        while total > self.memory_budget and len(self._frames) > 1:
+            _, evicted = self._frames.popitem(last=False)
+            total -= evicted['bytes']
+        return frame
+
+    def _remember_model(self, model_filename, bundle):
+        self._models[model_filename] = bundle
+        self._models.move_to_end(model_filename)
+        while len(self._models) > self.max_models:
+            self._models.popitem(last=False)
+
+    def _handle_path(self, dataset_id):
+        # Handles are generated hex ids; anything else cannot name a file here
+        if not isinstance(dataset_id, str) or not dataset_id.isalnum():
+            raise KeyError(f"Unknown dataset: {dataset_id}")
+        return os.path.join(self.directory, dataset_id + '.json')
+
+    def _write_handle(self, handle):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(handle, f)
+        os.replace(tmp_path, self._handle_path(handle['dataset_id']))
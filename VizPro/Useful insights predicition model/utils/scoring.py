@@ -0,0 +1,108 @@
+"""Score CSV files with a saved model in fixed-size chunks.
+
+Usage:
+    python -m utils.scoring models/<model file> input.csv output.csv [--chunksize N] [--workers N]
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from vizpro_common.ingestion import SAMPLE_ROWS, sentinel_na_values
+from utils.registry import read_model
+from utils.training import predict
+
+DEFAULT_CHUNKSIZE = 50000
+# Chunks queued per worker; bounds how many are held in memory at once
+CHUNKS_IN_FLIGHT = 2
+
+# The model of a scoring worker process, loaded once by _init_worker
+_worker_bundle = None
+
+
+def score_csv(source, output, bundle=None, model_path=None, chunksize=DEFAULT_CHUNKSIZE, workers=1):
+    """Stream ``source`` through a model into ``output`` and return throughput stats.
+
+    The input is read ``chunksize`` rows at a time and every chunk is
+    written out with a ``<target>_prediction`` column as soon as it is
+    scored, so memory stays bounded however long the file is. With
+    ``workers`` > 1 chunks are scored in that many processes, which load
+    the model from ``model_path`` themselves; output order is preserved.
+    """
+    if bundle is None:
+        bundle = read_model(model_path)
+    column = f"{bundle['target_column']}_prediction"
+    # Read placeholders as missing in the same columns training did
+    na_values = sentinel_na_values(pd.read_csv(source, nrows=SAMPLE_ROWS), parse_dates=False)
+    chunks = pd.read_csv(source, chunksize=chunksize, na_values=na_values)
+
+    start = time.perf_counter()
+    rows = 0
+    count = 0
+    with open(output, 'w', newline='') as out:
+        for chunk, predictions in _scored_chunks(chunks, bundle, model_path, workers):
+            chunk[column] = predictions
+            chunk.to_csv(out, index=False, header=count == 0)
+            rows += len(chunk)
+            count += 1
+    seconds = time.perf_counter() - start
+
+    return {
+        'rows': rows,
+        'chunks': count,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+        'prediction_column': column
+    }
+
+
+def _scored_chunks(chunks, bundle, model_path, workers):
+    """Yield ``(chunk, predictions)`` in input order."""
+    if workers <= 1 or model_path is None:
+        for chunk in chunks:
+            yield chunk, predict(bundle, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_worker, initargs=(model_path,)) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, executor.submit(_predict_chunk, chunk)))
+            if len(pending) >= workers * CHUNKS_IN_FLIGHT:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+
+def _init_worker(model_path):
+    global _worker_bundle
+    _worker_bundle = read_model(model_path)
+
+
+def _predict_chunk(chunk):
+    return predict(_worker_bundle, chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('model', help='saved model file (.joblib, .joblib.z or .pkl)')
+    parser.add_argument('input', help='CSV file to score')
+    parser.add_argument('output', help='where to write the scored CSV')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    stats = score_csv(args.input, args.output, model_path=os.path.abspath(args.model),
+                      chunksize=args.chunksize, workers=args.workers)
+    print(f"Scored {stats['rows']:,} rows in {stats['chunks']} chunks, {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/s) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+import os
+import time
+from datetime import datetime
+
+import joblib
+import pandas as pd
+from scipy import sparse
+from sklearn.model_selection import train_test_split
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from vizpro_common.dataset_cache import DatasetCache
+from utils.features import FeatureEncoder, screen_columns
+from utils.registry import DatasetRegistry
+
+MODEL_TYPES = ('linear_regression', 'logistic_regression',
+               'random_forest_classifier', 'random_forest_regressor')
+REGRESSION_MODELS = ('linear_regression', 'random_forest_regressor')
+# Estimators trained on the encoder's sparse CSR output as is; forests
+# split faster on dense arrays
+SPARSE_MODELS = ('linear_regression', 'logistic_regression')
+# Trees grown between progress reports (and chances to cancel)
+FOREST_STEP = 10
+
+
+def build_model(model_type):
+    """Return an unfitted estimator for one of MODEL_TYPES."""
+    if model_type == 'linear_regression':
+        return LinearRegression()
+    elif model_type == 'logistic_regression':
+        return LogisticRegression(multi_class='multinomial', max_iter=1000)
+    elif model_type == 'random_forest_classifier':
+        return RandomForestClassifier(n_estimators=100, random_state=42)
+    elif model_type == 'random_forest_regressor':
+        return RandomForestRegressor(n_estimators=100, random_state=42)
+    raise ValueError(f'Invalid model type: {model_type}')
+
+
+def train_model(df, target_column, model_type, models_dir, progress=None, compress=0):
+    """Fit, evaluate and save a model; returns ``(result, bundle)``.
+
+    ``result`` is the /train response body and ``bundle`` the dict saved
+    to ``models_dir`` (see save_model). ``progress(stage, fraction)`` is
+    called as the work advances; an exception raised from it aborts
+    training.
+    """
+    progress = progress or (lambda stage, fraction: None)
+
+    progress('preparing', 0.05)
+    X = df.drop(columns=[target_column])
+    y = df[target_column]
+
+    keep, screening = screen_columns(X)
+    if not keep:
+        raise ValueError('No usable feature columns: every column is empty, constant or an identifier')
+    X = X[keep]
+
+    # Handle categorical variables; the fitted encoder is saved with the
+    # model so new data is encoded into exactly the same columns
+    start = time.perf_counter()
+    encoder = FeatureEncoder()
+    X = encoder.fit_transform(X)
+    sparse_input = model_type in SPARSE_MODELS
+    if not sparse_input:
+        X = X.toarray()
+    feature_names = encoder.feature_names_
+    encode_seconds = time.perf_counter() - start
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    split_info = {
+        'train_size': X_train.shape[0],
+        'test_size': X_test.shape[0],
+        'train_percentage': 80,
+        'test_percentage': 20
+    }
+
+    model = build_model(model_type)
+    progress('fitting', 0.1)
+    start = time.perf_counter()
+    _fit(model, X_train, y_train, progress)
+    fit_seconds = time.perf_counter() - start
+
+    progress('evaluating', 0.85)
+    y_train_pred = model.predict(X_train)
+    y_test_pred = model.predict(X_test)
+    train_score = float(model.score(X_train, y_train))
+    test_score = float(model.score(X_test, y_test))
+
+    metrics = {
+        'train_score': train_score,
+        'test_score': test_score,
+        'split_info': split_info
+    }
+
+    if model_type in REGRESSION_MODELS:
+        from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
+        metrics.update({
+            'train_mse': float(mean_squared_error(y_train, y_train_pred)),
+            'test_mse': float(mean_squared_error(y_test, y_test_pred)),
+            'train_mae': float(mean_absolute_error(y_train, y_train_pred)),
+            'test_mae': float(mean_absolute_error(y_test, y_test_pred)),
+            'train_r2': float(r2_score(y_train, y_train_pred)),
+            'test_r2': float(r2_score(y_test, y_test_pred))
+        })
+    else:  # Classification metrics
+        from sklearn.metrics import precision_score, recall_score, f1_score
+        try:
+            metrics.update({
+                'train_precision': float(precision_score(y_train, y_train_pred, average='weighted')),
+                'test_precision': float(precision_score(y_test, y_test_pred, average='weighted')),
+                'train_recall': float(recall_score(y_train, y_train_pred, average='weighted')),
+                'test_recall': float(recall_score(y_test, y_test_pred, average='weighted')),
+                'train_f1': float(f1_score(y_train, y_train_pred, average='weighted')),
+                'test_f1': float(f1_score(y_test, y_test_pred, average='weighted'))
+            })
+        except Exception as e:
+            print(f"Warning: Could not calculate classification metrics: {str(e)}")
+            metrics.update({
+                'train_accuracy': train_score,
+                'test_accuracy': test_score
+            })
+
+    feature_importance = None
+    if hasattr(model, 'feature_importances_'):
+        feature_importance = dict(zip(feature_names, model.feature_importances_.tolist()))
+    elif hasattr(model, 'coef_'):
+        if len(model.coef_.shape) == 1:
+            feature_importance = dict(zip(feature_names, abs(model.coef_).tolist()))
+        else:
+            feature_importance = dict(zip(feature_names, abs(model.coef_).mean(axis=0).tolist()))
+
+    progress('saving', 0.95)
+    bundle = {
+        'model': model,
+        'feature_names': feature_names,
+        'encoder': encoder,
+        'sparse_input': sparse_input,
+        'target_column': target_column,
+        'model_type': model_type,
+        'split_info': split_info
+    }
+    model_filename = save_model(bundle, models_dir, compress)
+
+    result = {
+        'model_type': model_type,
+        'metrics': metrics,
+        'feature_importance': feature_importance,
+        'model_filename': model_filename,
+        'screening': screening,
+        'training_stats': {
+            'n_features': len(feature_names),
+            'sparse': sparse_input,
+            'matrix_bytes': _matrix_bytes(X),
+            # What the same features would take as a dense float64 array
+            'dense_bytes': X.shape[0] * X.shape[1] * 8,
+            'encode_seconds': round(encode_seconds, 4),
+            'fit_seconds': round(fit_seconds, 4)
+        }
+    }
+    return result, bundle
+
+
+def save_model(bundle, models_dir, compress=0):
+    """Write a model bundle with joblib and return its file name.
+
+    Uncompressed artifacts (``.joblib``) are memory-mapped when loaded, so
+    the arrays of large forests are paged in from disk rather than copied.
+    ``compress`` (1-9) trades that for a smaller zlib file (``.joblib.z``).
+    """
+    # Microseconds keep concurrent jobs from writing the same file
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    extension = '.joblib.z' if compress else '.joblib'
+    model_filename = f"model_{bundle['model_type']}_{timestamp}{extension}"
+    joblib.dump(bundle, os.path.join(models_dir, model_filename),
+                compress=('zlib', compress) if compress else 0)
+    return model_filename
+
+
+def prepare_features(df, bundle):
+    """Encode ``df`` into exactly the columns the model was trained on."""
+    X = df.drop(columns=[bundle['target_column']], errors='ignore')
+    if 'encoder' in bundle:
+        X = bundle['encoder'].transform(X)
+        return X if bundle.get('sparse_input') else X.toarray()
+
+    # Models saved before the encoder existed
+    X = pd.get_dummies(X)
+    # Categories unseen in training are dropped; missing dummies are 0
+    return X.reindex(columns=bundle['feature_names'], fill_value=0)
+
+
+def predict(bundle, df):
+    """Predictions of a model bundle for the rows of ``df``."""
+    return bundle['model'].predict(prepare_features(df, bundle))
+
+
+def _matrix_bytes(X):
+    if sparse.issparse(X):
+        return int(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes)
+    return int(X.nbytes)
+
+
+def _fit(model, X_train, y_train, progress):
+    if not isinstance(model, (RandomForestClassifier, RandomForestRegressor)):
+        model.fit(X_train, y_train)
+        return
+
+    # Grow the forest in steps; with warm_start sklearn draws the same tree
+    # seeds as a single fit, so the model is identical
+    total = model.n_estimators
+    model.set_params(warm_start=True)
+    for n_trees in range(FOREST_STEP, total + FOREST_STEP, FOREST_STEP):
+        model.set_params(n_estimators=min(n_trees, total))
+        model.fit(X_train, y_train)
+        progress('fitting', 0.1 + 0.75 * min(n_trees, total) / total)
+    model.set_params(warm_start=False)
+
+
+def run_training_job(directories, dataset_id, target_column, model_type, compress, progress):
+    """Job entry point: train on a registered dataset and record the model.
+
+    Runs in a worker process, so the dataset is read from the shared cache
+    by handle rather than passed in.
+    """
+    cache = DatasetCache(directories['cache'])
+    registry = DatasetRegistry(directories['sessions'], cache, directories['models'])
+    progress('loading', 0.0)
+    df = registry.get_data(dataset_id)
+    result, _ = train_model(df, target_column, model_type, directories['models'], progress, compress)
+    registry.set_model(dataset_id, result['model_filename'])
+    return result
@@ -0,0 +1,6 @@
+"""Modules shared by the VizPro apps (Data Cleaning Model and Useful
+insights prediction model).
+
+Each app's ``utils`` package puts the VizPro directory on ``sys.path``,
+so these are imported as ``vizpro_common.<module>``.
+"""
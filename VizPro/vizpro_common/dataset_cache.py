@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Bump when ingestion changes the DataFrames it produces, so stale entries
+# are not served for new code
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+_BLOCK_SIZE = 1024 * 1024
+
+
+def content_hash(source):
+    """Hex digest of a file's bytes; ``source`` is a path or a binary file object."""
+    digest = hashlib.blake2b(digest_size=20)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            for block in iter(lambda: f.read(_BLOCK_SIZE), b''):
+                digest.update(block)
+    else:
+        for block in iter(lambda: source.read(_BLOCK_SIZE), b''):
+            digest.update(block)
+        source.seek(0)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Parsed uploads stored on disk, keyed by the hash of the raw file.
+
+    Entries are Parquet files when pyarrow is installed, so reads can be
+    memory-mapped and limited to the columns needed; without it they fall
+    back to pickles, which still skip parsing. The least recently used
+    entries are deleted once the directory exceeds ``max_bytes``.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = '.parquet' if HAS_PYARROW else '.pkl'
+        os.makedirs(directory, exist_ok=True)
+
+    def key_for(self, source, filename, settings=None):
+        """Cache key of an upload: content hash plus reader settings.
+
+        ``settings`` are whatever options change the parsed DataFrame (date
+        parsing, schema thresholds, ...), so readers configured differently
+        never share an entry even when they share a directory.
+        """
+        suffix = os.path.splitext(filename)[1].lower().lstrip('.')
+        options = json.dumps(settings or {}, sort_keys=True, default=str)
+        options_hash = hashlib.blake2b(options.encode('utf-8'), digest_size=6).hexdigest()
+        return f"{content_hash(source)}-{suffix}-{options_hash}-v{CACHE_VERSION}"
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.extension)
+
+    def get(self, key, columns=None):
+        """Return the cached DataFrame (or just ``columns`` of it), or None."""
+        path = self.path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            if HAS_PYARROW:
+                df = pd.read_parquet(path, columns=columns, memory_map=True)
+            else:
+                df = pd.read_pickle(path)
+                if columns is not None:
+                    df = df[columns]
+        except Exception:
+            # A truncated or unreadable entry is a miss; it gets rewritten
+            return None
+        os.utime(path)
+        return df
+
+    def put(self, key, df):
+        """Write ``df`` under ``key`` atomically, then trim the cache."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            if HAS_PYARROW:
+                df.to_parquet(tmp_path, index=False)
+            else:
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, self.path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.trim()
+
+    def load(self, source, filename, reader, settings=None):
+        """Return ``(df, key, hit)`` for an upload, parsing it only on a miss.
+
+        ``reader(source, filename)`` parses the file; it may return None for
+        unsupported files, which are not cached. ``settings`` describe how
+        the reader is configured and become part of the key.
+        """
+        key = self.key_for(source, filename, settings)
+        df = self.get(key)
+        if df is not None:
+            return df, key, True
+        df = reader(source, filename)
+        if df is not None:
+            try:
+                self.put(key, df)
+            except Exception as e:
+                # Caching is an optimization; the upload itself succeeded
+                logging.warning(f"Could not cache {filename}: {str(e)}")
+        return df, key, False
+
+    def trim(self):
+        """Delete least recently used entries beyond ``max_bytes``."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(self.extension):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
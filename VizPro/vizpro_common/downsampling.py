@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+# Points sent to the browser per trace unless a request asks otherwise
+DEFAULT_MAX_POINTS = 5000
+# Scatter plots with more than this many times max_points rows are drawn
+# as a 2D density heatmap instead of a sample
+BIN_FACTOR = 20
+DENSITY_BINS = 100
+# Percentiles bounding the density map, so a few outliers cannot squash
+# every other point into one corner
+DENSITY_PERCENTILES = (0.5, 99.5)
+
+
+def parse_max_points(value, default=DEFAULT_MAX_POINTS):
+    """Read a ``max_points`` request value; raises ValueError if invalid."""
+    if value is None or value == '':
+        return default
+    max_points = int(value)
+    if max_points < 3:
+        raise ValueError("max_points must be at least 3")
+    return max_points
+
+
+def lttb_indices(x, y, max_points):
+    """Positions of the points Largest-Triangle-Three-Buckets keeps.
+
+    ``x`` must be sorted. The first and last points are always kept; every
+    bucket in between contributes the point forming the largest triangle
+    with the previous pick and the mean of the next bucket, which keeps
+    peaks and troughs that plain striding would skip.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = (np.arange(max_points - 1) * (n - 2) / (max_points - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def decimate_series(df, x_col, y_col, max_points=DEFAULT_MAX_POINTS):
+    """Reduce a line chart's rows with LTTB; returns ``(df, info)``.
+
+    Rows are ordered by ``x_col`` when it is numeric or a date; other x
+    columns keep the row order. Non-numeric values fall back to sampling.
+    """
+    data = df[[x_col, y_col]].dropna() if x_col != y_col else df[[x_col]].dropna()
+    original = len(data)
+    x = data[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x) or pd.api.types.is_numeric_dtype(x):
+        data = data.sort_values(x_col, kind='stable')
+        x = data[x_col]
+        x_values = x.to_numpy().astype(np.int64) if pd.api.types.is_datetime64_any_dtype(x) else x.to_numpy()
+    else:
+        x_values = np.arange(original)
+
+    if original <= max_points:
+        return data, reduction_info(original, original, 'none')
+    if not pd.api.types.is_numeric_dtype(data[y_col]):
+        return sample_points(data, max_points)
+    keep = lttb_indices(x_values, data[y_col].to_numpy(), max_points)
+    return data.iloc[keep], reduction_info(original, len(keep), 'lttb')
+
+
+def sample_points(df, max_points=DEFAULT_MAX_POINTS, columns=None):
+    """Uniform random sample of rows; returns ``(df, info)``.
+
+    A uniform sample keeps the point density of every region in proportion.
+    The rows holding the minimum and maximum of each numeric column in
+    ``columns`` are always kept, so the axes span the full data.
+    """
+    original = len(df)
+    if original <= max_points:
+        return df, reduction_info(original, original, 'none')
+
+    extremes = set()
+    for col in columns or []:
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values) and values.notna().any():
+            extremes.update((int(np.nanargmin(values.to_numpy(dtype=np.float64))),
+                             int(np.nanargmax(values.to_numpy(dtype=np.float64)))))
+    rng = np.random.default_rng(0)
+    picked = rng.choice(original, size=max(max_points - len(extremes), 0), replace=False)
+    keep = np.union1d(picked, np.fromiter(extremes, dtype=np.int64, count=len(extremes)))
+    return df.iloc[keep], reduction_info(original, len(keep), 'sample')
+
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    """Bin centres and point counts of a 2D histogram, plus how many were clipped.
+
+    Bins span DENSITY_PERCENTILES of each axis; points beyond that range
+    are clipped into the edge bins and counted, which is returned as the
+    fourth value. Infinite values are left out. Empty bins are NaN.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    ranges = [_robust_range(values) for values in (x, y)]
+    outside = np.zeros(len(x), dtype=bool)
+    for values, (low, high) in zip((x, y), ranges):
+        outside |= (values < low) | (values > high)
+    counts, x_edges, y_edges = np.histogram2d(np.clip(x, *ranges[0]), np.clip(y, *ranges[1]),
+                                              bins=bins, range=ranges)
+    x_centres = (x_edges[:-1] + x_edges[1:]) / 2
+    y_centres = (y_edges[:-1] + y_edges[1:]) / 2
+    # Rows of a heatmap are y; empty (NaN) cells stay transparent
+    z = counts.T.copy()
+    z[z == 0] = np.nan
+    return x_centres, y_centres, z, int(outside.sum())
+
+
+def scatter_method(df, x_col, y_col, max_points=DEFAULT_MAX_POINTS, color_col=None):
+    """'none', 'sample' or 'bin' for a scatter of ``len(df)`` rows."""
+    if len(df) <= max_points:
+        return 'none'
+    numeric = all(pd.api.types.is_numeric_dtype(df[col]) for col in (x_col, y_col))
+    # A heatmap has no per-point colour, so coloured scatters are sampled
+    if numeric and color_col is None and len(df) > BIN_FACTOR * max_points:
+        return 'bin'
+    return 'sample'
+
+
+def reduction_info(original, plotted, method, clipped=0):
+    info = {
+        'method': method,
+        'original_points': int(original),
+        'plotted_points': int(plotted),
+        'reduction': round(original / plotted, 2) if plotted else None
+    }
+    if clipped:
+        # Outliers drawn in the edge bins of a density map
+        info['clipped_points'] = int(clipped)
+    return info
+
+
+def annotate_reduction(fig, info):
+    """Note under the title how much a figure's data was reduced."""
+    if info['method'] == 'none':
+        return fig
+    if info['method'] == 'bin':
+        text = f"{info['original_points']:,} points binned into a density map"
+        if info.get('clipped_points'):
+            text += f"; {info['clipped_points']:,} outliers clipped to the map's edges"
+    else:
+        text = f"Showing {info['plotted_points']:,} of {info['original_points']:,} points ({info['method']})"
+    fig.add_annotation(text=text, xref='paper', yref='paper', x=0.5, y=1.02,
+                       showarrow=False, font={'size': 11, 'color': 'gray'})
+    return fig
+
+
+def _robust_range(values):
+    """DENSITY_PERCENTILES of ``values``, widened when that leaves no width."""
+    if values.size == 0:
+        return 0.0, 1.0
+    low, high = np.percentile(values, DENSITY_PERCENTILES)
+    if low == high:
+        low, high = values.min(), values.max()
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return float(low), float(high)
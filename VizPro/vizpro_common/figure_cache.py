@@ -0,0 +1,153 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Bump when chart builders change their output, so stale figures are not
+# served for new code
+FIGURE_CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+
+
+class FigureCache:
+    """Serialized figures keyed by dataset fingerprint, chart type and parameters.
+
+    Figures are kept in memory up to ``max_bytes`` of JSON, least recently
+    used first out. With a ``directory``, evicted figures spill to JSON
+    files there (up to ``max_disk_bytes``) and are read back on a later
+    hit. Fingerprints change whenever the data does, so entries never need
+    invalidating; stale ones simply age out.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, directory=None, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        # key -> (figure, size in bytes)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'spills': 0}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key_for(fingerprint, kind, params=None):
+        """Cache key of one chart of one dataset version."""
+        spec = json.dumps([FIGURE_CACHE_VERSION, fingerprint, kind, params or {}],
+                          sort_keys=True, default=str)
+        return hashlib.blake2b(spec.encode('utf-8'), digest_size=20).hexdigest()
+
+    def get_or_create(self, fingerprint, kind, params, build):
+        """Return ``(figure, hit)``, calling ``build()`` only on a miss.
+
+        A figure that fails to build is not cached. None, for charts with
+        nothing to draw, is cached like any other result.
+        """
+        key = self.key_for(fingerprint, kind, params)
+        found, figure = self._lookup(key)
+        if found:
+            return figure, True
+        figure = build()
+        self.put(key, figure)
+        return figure, False
+
+    def get(self, key):
+        """Return the cached figure, or None."""
+        return self._lookup(key)[1]
+
+    def put(self, key, figure):
+        """Keep a JSON-ready figure, evicting least recently used ones beyond ``max_bytes``."""
+        size = len(json.dumps(figure))
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (figure, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, (old_figure, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                self._stats['evictions'] += 1
+                evicted.append((old_key, old_figure))
+        for old_key, old_figure in evicted:
+            self._spill(old_key, old_figure)
+
+    def stats(self):
+        """Hit and miss counters plus the current size of the cache."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else None
+        stats['disk_spill'] = bool(self.directory)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _lookup(self, key):
+        """Return ``(found, figure)``, counting a hit or a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return True, self._entries[key][0]
+
+        found, figure = self._read_spilled(key)
+        with self._lock:
+            self._stats['disk_hits' if found else 'misses'] += 1
+        if found:
+            self.put(key, figure)
+        return found, figure
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def _read_spilled(self, key):
+        if not self.directory:
+            return False, None
+        try:
+            with open(self._path(key)) as f:
+                figure = json.load(f)
+            os.utime(self._path(key))
+        except (OSError, ValueError):
+            return False, None
+        return True, figure
+
+    def _spill(self, key, figure):
+        if not self.directory:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(figure, f)
+            os.replace(tmp_path, self._path(key))
+            with self._lock:
+                self._stats['spills'] += 1
+            self._trim_disk()
+        except OSError as e:
+            # Spilling is an optimization; the figure can always be rebuilt
+            logging.warning(f"Could not spill figure {key}: {str(e)}")
+
+    def _trim_disk(self):
+        """Delete least recently used spilled figures beyond ``max_disk_bytes``."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
@@ -0,0 +1,231 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Spreadsheet and export placeholders read as missing values, on top of
+# pandas' defaults ('#N/A', 'NA', 'NULL', 'None', 'nan', ...), but only in
+# columns whose other values are all numbers or dates: elsewhere '-' or
+# '?' may well be data
+NUMERIC_NULL_SENTINELS = ['none', '-', '--', '?', '#VALUE!', '#REF!', '#DIV/0!']
+DEFAULT_CHUNKSIZE = 100000
+SAMPLE_ROWS = 10000
+# Text columns with at most this share of distinct values become categories
+CATEGORY_MAX_RATIO = 0.5
+
+
+def read_table(source, filename, chunksize=DEFAULT_CHUNKSIZE, sample_rows=SAMPLE_ROWS,
+               parse_dates=True):
+    """Read a CSV or Excel upload into a compactly typed DataFrame.
+
+    A sample of the file decides the dtype of every column: repeated text
+    becomes ``category``, day-first date strings become ``datetime64``,
+    whole numbers ``int32`` and decimals ``float32`` where that loses
+    nothing. CSV files are parsed in chunks so the untyped text is never
+    held for the whole file at once. Returns None for unsupported formats.
+    """
+    if filename.endswith('.csv'):
+        sample = pd.read_csv(source, nrows=sample_rows)
+        na_values = sentinel_na_values(sample, parse_dates)
+        if na_values:
+            _rewind(source)
+            sample = pd.read_csv(source, nrows=sample_rows, na_values=na_values)
+        schema = infer_schema(sample, parse_dates)
+        _rewind(source)
+        dtypes = {col: 'category' for col, kind in schema.items() if kind in ('category', 'datetime')}
+        chunks = pd.read_csv(source, chunksize=chunksize, na_values=na_values, dtype=dtypes)
+        df = _concat_chunks(list(chunks), sample.columns)
+    elif filename.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(source)
+        for col in sentinel_na_values(df.head(sample_rows), parse_dates):
+            df[col] = _drop_sentinels(df[col])
+        schema = infer_schema(df.head(sample_rows), parse_dates)
+    else:
+        return None
+    return apply_schema(df, schema)
+
+
+def reader_settings(parse_dates=True):
+    """The options read_table parses with, for keying cached results."""
+    return {
+        'parse_dates': parse_dates,
+        'sample_rows': SAMPLE_ROWS,
+        'category_max_ratio': CATEGORY_MAX_RATIO,
+        'null_sentinels': NUMERIC_NULL_SENTINELS
+    }
+
+
+def sentinel_na_values(sample, parse_dates=True):
+    """``na_values`` applying NUMERIC_NULL_SENTINELS to the columns of ``sample`` they fit.
+
+    A text column qualifies when it holds some sentinels and every other
+    value is a number (or, with ``parse_dates``, a date).
+    """
+    na_values = {}
+    for col in sample.columns:
+        if sample[col].dtype != object:
+            continue
+        values = sample[col].dropna().astype(str)
+        is_sentinel = values.isin(NUMERIC_NULL_SENTINELS)
+        if not is_sentinel.any() or is_sentinel.all():
+            continue
+        rest = values[~is_sentinel]
+        if pd.to_numeric(rest, errors='coerce').notna().all() or (parse_dates and _looks_like_dates(rest)):
+            na_values[col] = NUMERIC_NULL_SENTINELS
+    return na_values
+
+
+def infer_schema(sample, parse_dates=True):
+    """Pick a storage kind for every column from a sample of rows.
+
+    Kinds are ``empty``, ``int``, ``float``, ``datetime``, ``category``,
+    ``text`` and ``keep`` (left as parsed).
+    """
+    schema = {}
+    for col in sample.columns:
+        series = sample[col]
+        values = series.dropna()
+        if values.empty:
+            schema[col] = 'empty'
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            schema[col] = 'keep'
+        elif pd.api.types.is_integer_dtype(series):
+            schema[col] = 'int'
+        elif pd.api.types.is_float_dtype(series):
+            integral = np.array_equal(values, np.floor(values))
+            schema[col] = 'int' if integral else 'float'
+        elif parse_dates and _looks_like_dates(values):
+            schema[col] = 'datetime'
+        elif values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+            schema[col] = 'category'
+        else:
+            schema[col] = 'text'
+    return schema
+
+
+def apply_schema(df, schema):
+    """Convert the columns of ``df`` to the kinds chosen by infer_schema.
+
+    A conversion that would change any value is skipped, so a sample that
+    misjudged a column costs memory, never data.
+    """
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if kind == 'empty' and series.isna().all():
+            df[col] = series.astype(np.float32)
+        elif kind in ('int', 'float') and pd.api.types.is_numeric_dtype(series):
+            df[col] = _downcast_number(series)
+        elif kind == 'datetime':
+            df[col] = _to_datetime(series)
+        elif kind == 'category' and not isinstance(series.dtype, pd.CategoricalDtype):
+            df[col] = series.astype('category')
+    return df
+
+
+def memory_report(df):
+    """Bytes held by every column, their dtypes and the total."""
+    usage = df.memory_usage(deep=True, index=False)
+    return {
+        'total_bytes': int(usage.sum()),
+        'columns': {
+            str(col): {'dtype': str(df[col].dtype), 'bytes': int(usage[col])}
+            for col in df.columns
+        }
+    }
+
+
+def widen_floats(df):
+    """Copy of ``df`` with float32 columns widened to the values they print as.
+
+    Meant for the small windows sent to the browser, so 16.9 stored as
+    float32 is shown as 16.9 rather than 16.899999618530273.
+    """
+    narrow = [col for col in df.columns if df[col].dtype == np.float32]
+    if not narrow:
+        return df
+    df = df.copy()
+    for col in narrow:
+        df[col] = df[col].to_numpy().astype(str).astype(np.float64)
+    return df
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+
+def _concat_chunks(chunks, columns):
+    """Concatenate chunks, merging categorical columns without losing the dtype."""
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    if len(chunks) == 1:
+        return chunks[0]
+
+    categorical = [col for col in columns
+                   if isinstance(chunks[0][col].dtype, pd.CategoricalDtype)]
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for col in categorical:
+        merged = union_categoricals([chunk[col] for chunk in chunks], sort_categories=True)
+        df[col] = pd.Categorical(merged)
+    return df[list(columns)]
+
+
+def _looks_like_dates(values):
+    """True if every distinct sampled value parses as a day-first date."""
+    distinct = pd.Series(values.astype(str).unique())
+    if not distinct.str.contains(r'\d').all():
+        return False
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        parsed = pd.to_datetime(distinct, dayfirst=True, errors='coerce')
+    return bool(parsed.notna().all())
+
+
+def _to_datetime(series):
+    """Parse day-first dates; if any value fails, return the column as a category."""
+    # Parse each distinct string once and map the codes back to rows
+    categorical = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        parsed = pd.to_datetime(categorical.cat.categories.astype(str), dayfirst=True, errors='coerce')
+    if parsed.isna().any():
+        return categorical
+    codes = categorical.cat.codes.to_numpy()
+    values = parsed.to_numpy()[codes]
+    values[codes < 0] = np.datetime64('NaT')
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def _drop_sentinels(series):
+    """Blank out NUMERIC_NULL_SENTINELS and read what is left as numbers if it can be."""
+    series = series.mask(series.astype(str).isin(NUMERIC_NULL_SENTINELS))
+    try:
+        return pd.to_numeric(series)
+    except (ValueError, TypeError):
+        return series
+
+
+def _downcast_number(series):
+    """int32 or float32 when every value survives the conversion."""
+    values = series.to_numpy()
+    if pd.api.types.is_integer_dtype(series):
+        info = np.iinfo(np.int32)
+        if len(values) and (values.min() < info.min or values.max() > info.max):
+            return series
+        return series.astype(np.int32)
+
+    if pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+        present = values[~np.isnan(values)]
+        if present.size and np.array_equal(present, np.floor(present)):
+            info = np.iinfo(np.int32)
+            if present.size == values.size and info.min <= present.min() and present.max() <= info.max:
+                return series.astype(np.int32)
+        # float32 only if each value reads back the same through its
+        # shortest float32 representation
+        narrow = present.astype(np.float32)
+        if np.array_equal(narrow.astype(str).astype(np.float64), present):
+            return series.astype(np.float32)
+    return series
@@ -0,0 +1,70 @@
+import numpy as np
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def parse_window_args(args):
+    """Read offset/limit/columns/sort from request query arguments.
+
+    ``columns`` and ``sort`` are comma separated; a leading ``-`` on a sort
+    key sorts that column in descending order.
+    """
+    try:
+        offset = int(args.get('offset', 0))
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError("offset and limit must be integers")
+    if offset < 0 or limit < 0:
+        raise ValueError("offset and limit must not be negative")
+
+    columns = [c for c in args.get('columns', '').split(',') if c] or None
+    sort = [s for s in args.get('sort', '').split(',') if s.lstrip('-')] or None
+    return offset, min(limit, MAX_PAGE_SIZE), columns, sort
+
+
+def sort_order(df, sort, cache=None):
+    """Return row positions of ``df`` ordered by the given sort keys.
+
+    Orderings are kept in ``cache`` (if given) so paging through a sorted
+    view only pays for the sort once.
+    """
+    key = tuple(sort)
+    if cache is not None and key in cache:
+        return cache[key]
+
+    by = [s.lstrip('-') for s in sort]
+    missing = [c for c in by if c not in df.columns]
+    if missing:
+        raise ValueError(f"Sort columns not found: {missing}")
+    ascending = [not s.startswith('-') for s in sort]
+
+    keys = df[by].reset_index(drop=True)
+    order = keys.sort_values(by=by, ascending=ascending, kind='mergesort',
+                             na_position='last').index.to_numpy()
+    if cache is not None:
+        cache[key] = order
+    return order
+
+
+def get_row_window(df, offset=0, limit=DEFAULT_PAGE_SIZE, columns=None, sort=None,
+                   order_cache=None):
+    """Slice one page of rows (and optionally columns) out of ``df``.
+
+    Only the requested window is copied, so the cost is independent of the
+    size of the dataset once any sort order has been computed.
+    """
+    if columns:
+        missing = [c for c in columns if c not in df.columns]
+        if missing:
+            raise ValueError(f"Columns not found: {missing}")
+        col_positions = df.columns.get_indexer(columns)
+    else:
+        col_positions = np.arange(len(df.columns))
+
+    if sort:
+        positions = sort_order(df, sort, order_cache)[offset:offset + limit]
+    else:
+        positions = np.arange(offset, min(offset + limit, len(df)))
+
+    return df.iloc[positions, col_positions]
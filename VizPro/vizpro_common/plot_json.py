@@ -0,0 +1,73 @@
+import base64
+import json
+import math
+
+import numpy as np
+from plotly.utils import PlotlyJSONEncoder
+
+# Typed array codes plotly.js (2.28+) decodes from base64 ``bdata``; both apps'
+# templates pin plotly.js 2.35.2, and an older one would not draw these figures
+TYPED_ARRAY_CODES = {
+    'int8': 'i1', 'uint8': 'u1',
+    'int16': 'i2', 'uint16': 'u2',
+    'int32': 'i4', 'uint32': 'u4',
+    'float32': 'f4', 'float64': 'f8'
+}
+
+
+def figure_payload(fig):
+    """``{'data': ..., 'layout': ...}`` of a figure, ready for jsonify.
+
+    The figure is converted with a single ``to_dict``. Numeric trace arrays
+    become base64 typed arrays (``{'dtype', 'bdata', 'shape'}``) instead of
+    number lists, which are smaller and skip a float-to-text round trip
+    on both ends. Other arrays, such as dates or labels, become plain lists.
+    """
+    figure = fig.to_dict()
+    return {
+        'data': [_encode(trace, typed=True) for trace in figure['data']],
+        'layout': _encode(figure['layout'], typed=False)
+    }
+
+
+def typed_array(values):
+    """Encode a numeric array as a plotly.js typed array.
+
+    plotly.js has no 64-bit integers, so those are narrowed to 32 bits
+    when their values fit and sent as float64 otherwise.
+    """
+    arr = np.asarray(values)
+    if arr.dtype.kind in 'iu' and arr.dtype.itemsize == 8:
+        narrow = np.int32 if arr.dtype.kind == 'i' else np.uint32
+        limits = np.iinfo(narrow)
+        fits = arr.size == 0 or (arr.min() >= limits.min and arr.max() <= limits.max)
+        arr = arr.astype(narrow if fits else np.float64)
+    elif arr.dtype == np.float16:
+        arr = arr.astype(np.float32)
+    arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder('<'))
+
+    encoded = {
+        'dtype': TYPED_ARRAY_CODES[arr.dtype.name],
+        'bdata': base64.b64encode(arr.tobytes()).decode('ascii')
+    }
+    if arr.ndim > 1:
+        encoded['shape'] = ', '.join(str(size) for size in arr.shape)
+    return encoded
+
+
+def _encode(value, typed):
+    if isinstance(value, dict):
+        return {key: _encode(item, typed) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item, typed) for item in value]
+    if isinstance(value, np.ndarray):
+        if typed and value.dtype.kind in 'iuf':
+            return typed_array(value)
+        # Dates, labels and mixed values: Plotly's own encoder knows them all
+        return json.loads(json.dumps(value, cls=PlotlyJSONEncoder))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        # NaN is not valid JSON; plotly.js treats null as a gap
+        return None
+    return value